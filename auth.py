@@ -0,0 +1,129 @@
+import json, os, time, uuid, threading
+import requests
+import tracing
+
+# === Клиент ely.by ===
+# Одно постоянное соединение (requests.Session) на все запросы к authserver,
+# сессия держится в памяти и пишется на диск только при изменении.
+# Перед запуском токен проверяется через /validate и при надобности
+# обновляется, чтобы протухший токен не всплывал уже внутри игры.
+
+VALIDATE_AGE = 5 * 60      # сколько секунд доверяем последней успешной проверке
+
+
+class AuthError(Exception):
+    pass
+
+
+class AuthClient:
+    def __init__(self, auth_url, refresh_url, validate_url, session_file):
+        self.auth_url = auth_url
+        self.refresh_url = refresh_url
+        self.validate_url = validate_url
+        self.session_file = session_file
+        self.http = requests.Session()
+        self._lock = threading.RLock()
+        self._session = None
+        self._loaded = False
+        self._validated_at = 0
+
+    # === Сессия на диске ===
+    def _load(self):
+        if not os.path.isfile(self.session_file):
+            return None
+        with open(self.session_file, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, sess):
+        tmp = self.session_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sess, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.session_file)
+
+    def current(self):
+        #сессия из памяти, с диска читаем один раз
+        with self._lock:
+            if not self._loaded:
+                self._session = self._load()
+                self._loaded = True
+            return self._session
+
+    def _set(self, sess):
+        with self._lock:
+            self._session = sess
+            self._loaded = True
+            self._validated_at = time.time()
+            self._save(sess)
+
+    # === Запросы ===
+    def _post(self, url, payload):
+        with tracing.span("auth " + url.rsplit("/", 1)[-1]):
+            r = self.http.post(url, json=payload, timeout=15)
+        if r.status_code != 200:
+            try:
+                message = r.json().get("errorMessage", "Неизвестная ошибка")
+            except ValueError:
+                message = f"HTTP {r.status_code}"
+            raise AuthError(message)
+        return r.json() if r.content else {}
+
+    def login(self, user, pwd):
+        #вход по логину и паролю, сессия сразу сохраняется
+        payload = {"username": user, "password": pwd, "clientToken": str(uuid.uuid4()), "requestUser": True}
+        d = self._post(self.auth_url, payload)
+        sess = {"accessToken": d["accessToken"], "clientToken": d["clientToken"],
+                "uuid": d["selectedProfile"]["id"], "username": d["selectedProfile"]["name"]}
+        self._set(sess)
+        return sess
+
+    def refresh(self):
+        sess = self.current()
+        if not sess:
+            raise AuthError("Сначала войдите через логин и пароль.")
+        payload = {"accessToken": sess["accessToken"], "clientToken": sess["clientToken"], "requestUser": True}
+        d = self._post(self.refresh_url, payload)
+        sess = dict(sess, accessToken=d["accessToken"],
+                    uuid=d["selectedProfile"]["id"], username=d["selectedProfile"]["name"])
+        self._set(sess)
+        return sess
+
+    def validate(self):
+        #True - токен живой, False - протух; сетевые ошибки пробрасываются
+        sess = self.current()
+        if not sess:
+            return False
+        try:
+            self._post(self.validate_url, {"accessToken": sess["accessToken"]})
+        except AuthError:
+            return False
+        with self._lock:
+            self._validated_at = time.time()
+        return True
+
+    def ensure_valid(self):
+        #сессия, годная для запуска: проверяем токен и обновляем его, если протух
+        sess = self.current()
+        if not sess:
+            raise AuthError("Сначала войдите")
+        if time.time() - self._validated_at < VALIDATE_AGE:
+            return sess
+        with self._lock:
+            try:
+                if self.validate():
+                    return self.current()
+                print("[Auth] Токен истёк, обновляем")
+                return self.refresh()
+            except AuthError as e:
+                raise AuthError(f"Сессия недействительна, войдите заново: {e}")
+            except requests.RequestException as e:
+                # без сети одиночная игра всё равно запустится
+                print("[Auth] ely.by недоступен, запускаем с сохранённым токеном:", e)
+                return sess
+
+    def validate_in_background(self):
+        def run():
+            try:
+                self.ensure_valid()
+            except Exception as e:
+                print("[Auth] Фоновая проверка сессии:", e)
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,286 @@
+import argparse, hashlib, json, os, platform, random, shutil, subprocess, sys, tempfile, threading, time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit
+
+# === Замеры производительности ===
+# Полностью офлайн: поднимаем локальный HTTP-сервер, который отдаёт
+# сгенерированные фикстуры вместо Mojang/Fabric/Forge и отвечает за ely.by,
+# а все запросы requests в этом процессе переписываются на него. Данные
+# лаунчера уводятся во временную папку через ECHOLAUNCHER_HOME.
+#   python bench.py [--runs 10] [--output bench.json] [--compare old.json]
+# Каждая фаза гоняется --runs раз, в json пишутся сырые замеры и перцентили,
+# --compare печатает, насколько p50 изменился относительно старого отчёта.
+
+BENCH_VERSION = "bench-1.0"
+BENCH_SEED = 1337
+BENCH_USER = "bench"
+STAND_IN_HOST = "127.0.0.1"
+
+
+# === Фикстуры ===
+def _blob(rng, size):
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def _put(root, url, data):
+    #файл фикстуры лежит по <хост>/<путь>, как его и просят
+    parts = urlsplit(url)
+    path = os.path.join(root, parts.netloc, *parts.path.lstrip("/").split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(data, (dict, list)):
+        data = json.dumps(data).encode()
+    with open(path, "wb") as f:
+        f.write(data)
+    return hashlib.sha1(data).hexdigest(), len(data)
+
+
+def make_fixtures(root, libraries=40, lib_size=64 * 1024, assets=300, asset_size=4 * 1024, client_size=1024 * 1024):
+    #ванильная версия BENCH_VERSION с библиотеками, ассетами и клиентом, плюс списки Fabric/Forge
+    rng = random.Random(BENCH_SEED)
+    libs = []
+    for i in range(libraries):
+        path = f"net/bench/lib{i}/1.0/lib{i}-1.0.jar"
+        url = f"https://libraries.minecraft.net/{path}"
+        sha1, size = _put(root, url, _blob(rng, lib_size))
+        libs.append({"name": f"net.bench:lib{i}:1.0",
+                     "downloads": {"artifact": {"path": path, "url": url, "sha1": sha1, "size": size}}})
+
+    objects = {}
+    for i in range(assets):
+        data = _blob(rng, asset_size)
+        h = hashlib.sha1(data).hexdigest()
+        _put(root, f"https://resources.download.minecraft.net/{h[:2]}/{h}", data)
+        objects[f"minecraft/bench/{i}.bin"] = {"hash": h, "size": len(data)}
+    index_url = f"https://piston-meta.mojang.com/v1/packages/bench/{BENCH_VERSION}-assets.json"
+    index_sha1, index_size = _put(root, index_url, {"objects": objects})
+
+    client_url = "https://piston-data.mojang.com/v1/objects/bench/client.jar"
+    client_sha1, client_size = _put(root, client_url, _blob(rng, client_size))
+
+    version = {
+        "id": BENCH_VERSION, "type": "release", "mainClass": "net.minecraft.client.main.Main",
+        "assets": BENCH_VERSION,
+        "assetIndex": {"id": BENCH_VERSION, "url": index_url, "sha1": index_sha1, "size": index_size, "totalSize": assets * asset_size},
+        "downloads": {"client": {"url": client_url, "sha1": client_sha1, "size": client_size}},
+        "libraries": libs,
+        "arguments": {
+            "game": ["--username", "${auth_player_name}", "--version", "${version_name}", "--gameDir", "${game_directory}",
+                     "--assetsDir", "${assets_root}", "--assetIndex", "${assets_index_name}", "--uuid", "${auth_uuid}",
+                     "--accessToken", "${auth_access_token}", "--versionType", "${version_type}"],
+            "jvm": ["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"],
+        },
+        "releaseTime": "2024-01-01T00:00:00+00:00", "time": "2024-01-01T00:00:00+00:00",
+    }
+    version_url = f"https://piston-meta.mojang.com/v1/packages/bench/{BENCH_VERSION}.json"
+    version_sha1, _ = _put(root, version_url, version)
+
+    _put(root, "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json", {
+        "latest": {"release": BENCH_VERSION, "snapshot": BENCH_VERSION},
+        "versions": [{"id": BENCH_VERSION, "type": "release", "url": version_url, "sha1": version_sha1,
+                      "time": version["time"], "releaseTime": version["releaseTime"], "complianceLevel": 1}],
+    })
+    _put(root, "https://meta.fabricmc.net/v2/versions/game",
+          [{"version": BENCH_VERSION, "stable": True}] + [{"version": f"1.{i}", "stable": True} for i in range(20, 0, -1)])
+    _put(root, "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json",
+          {"homepage": "https://files.minecraftforge.net/", "promos": {f"1.{i}-{kind}": f"{i}.0.{n}"
+           for i in range(1, 21) for kind, n in (("latest", 20), ("recommended", 10))}})
+    maven = "".join(f"<version>1.{i}-{i}.0.{n}</version>" for i in range(20, 0, -1) for n in range(20, 0, -1))
+    _put(root, "https://maven.minecraftforge.net/net/minecraftforge/forge/maven-metadata.xml",
+         f"<metadata><groupId>net.minecraftforge</groupId><artifactId>forge</artifactId><versioning><versions>{maven}</versions></versioning></metadata>".encode())
+    return {"libraries": libraries, "lib_size": lib_size, "assets": assets, "asset_size": asset_size, "client_size": client_size}
+
+
+# === Подставные сервера ===
+class StandInHandler(SimpleHTTPRequestHandler):
+    #GET - файлы фикстур (с Last-Modified, как у настоящих CDN), POST - ely.by
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("/", 2)[-1]
+        if path == "auth/validate":
+            return self._reply(200, b"")
+        if path in ("auth/authenticate", "auth/refresh"):
+            return self._reply(200, json.dumps({
+                "accessToken": hashlib.sha1(os.urandom(8)).hexdigest(),
+                "clientToken": body.get("clientToken", "bench"),
+                "selectedProfile": {"id": "0" * 32, "name": BENCH_USER},
+            }).encode())
+        self._reply(404, b'{"errorMessage": "not found"}')
+
+    def _reply(self, code, data):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_ins(fixtures_dir):
+    server = ThreadingHTTPServer((STAND_IN_HOST, 0), lambda *a: StandInHandler(*a, directory=fixtures_dir))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def install_redirect(base):
+    #все запросы requests в процессе уходят на подставной сервер: https://host/path -> base/host/path
+    from requests.adapters import HTTPAdapter
+    send = HTTPAdapter.send
+    if getattr(send, "bench_redirect", False):
+        return
+
+    def redirected(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.hostname != STAND_IN_HOST:
+            request.url = f"{base}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return send(self, request, **kwargs)
+    redirected.bench_redirect = True
+    HTTPAdapter.send = redirected
+
+
+# === Статистика ===
+def percentile(samples, p):
+    #линейная интерполяция между соседними замерами
+    s = sorted(samples)
+    k = (len(s) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def summarize(samples):
+    return {"runs": len(samples), "min": min(samples), "mean": sum(samples) / len(samples),
+            "p50": percentile(samples, 50), "p90": percentile(samples, 90), "p99": percentile(samples, 99),
+            "max": max(samples), "samples": samples}
+
+
+# === Фазы ===
+class Bench:
+    def __init__(self, home, runs):
+        self.home = home
+        self.runs = runs
+        self.samples = {}
+
+    def timed(self, phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.samples.setdefault(phase, []).append(time.perf_counter() - start)
+        return result
+
+    def reset(self):
+        #чистые данные лаунчера и заново созданные синглтоны core
+        import core
+        for name in ("instances", "session", "manifest_cache.json", "forge_index.json", "forge_cache.json"):
+            path = os.path.join(self.home, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        core._singletons.clear()
+        core.ensure_dirs()
+
+    def startup(self):
+        #холодный старт отдельного процесса: импорт core и чтение кэшей, как у `cli.py list`
+        env = dict(os.environ, ECHOLAUNCHER_HOME=self.home)
+        cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+        self.timed("startup_cli", lambda: subprocess.run([sys.executable, cli, "list"], env=env,
+                                                         stdout=subprocess.DEVNULL, check=True))
+
+    def run_once(self):
+        import core
+        self.reset()
+        self.timed("version_lists_cold", core.refresh_version_lists)
+        self.timed("version_lists_cached", core.load_cached_version_lists)
+        self.timed("forge_index_revalidate", lambda: core.refresh_forge_index(force=True))
+        self.timed("forge_pick", lambda: core.get_forge_index().pick("1.20"))
+
+        self.timed("login", lambda: core.authenticate(BENCH_USER, "bench"))
+        client = core.get_auth_client()
+        client._validated_at = 0
+        self.timed("validate", client.ensure_valid)
+
+        core.add_build("bench-a", BENCH_VERSION, "vanilla")
+        core.add_build("bench-b", BENCH_VERSION, "vanilla")
+        #a - пустое хранилище, b - те же файлы уже в хранилище, повтор a - быстрый путь по отметке
+        version_id = self.timed("ensure_installed_cold", lambda: core.ensure_installed(core.find_build("bench-a")))
+        self.timed("ensure_installed_store", lambda: core.ensure_installed(core.find_build("bench-b")))
+        self.timed("ensure_installed_warm", lambda: core.ensure_installed(core.find_build("bench-a")))
+
+        sess = core.load_session()
+        build_path = core.build_dir("bench-a")
+        options = {"username": sess["username"], "uuid": sess["uuid"], "token": sess["accessToken"],
+                   "jvmArguments": ["-Xmx2G"], "launcherName": core.LAUNCHER_NAME,
+                   "launcherVersion": core.LAUNCHER_VERSION, "gameDirectory": build_path,
+                   "executablePath": "java"}
+        self.timed("command_cold", lambda: core.get_command_cache().get_command(version_id, build_path, options))
+        self.timed("command_warm", lambda: core.get_command_cache().get_command(version_id, build_path, options))
+
+    def run(self, phases=None):
+        for i in range(self.runs):
+            print(f"[Bench] Прогон {i + 1}/{self.runs}", file=sys.stderr, flush=True)
+            self.startup()
+            self.run_once()
+        return {name: summarize(s) for name, s in self.samples.items() if not phases or name in phases}
+
+
+def compare(report, old):
+    print(f"{'фаза':<24}{'было p50':>12}{'стало p50':>12}{'изменение':>12}")
+    for name, cur in report["phases"].items():
+        prev = old.get("phases", {}).get(name)
+        if not prev:
+            print(f"{name:<24}{'-':>12}{cur['p50'] * 1000:>10.1f}мс{'новая':>12}")
+            continue
+        delta = (cur["p50"] - prev["p50"]) / prev["p50"] * 100 if prev["p50"] else 0
+        print(f"{name:<24}{prev['p50'] * 1000:>10.1f}мс{cur['p50'] * 1000:>10.1f}мс{delta:>+11.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench", description="Офлайн-замеры EchoLauncher")
+    parser.add_argument("--runs", type=int, default=10, help="сколько раз гонять каждую фазу")
+    parser.add_argument("--output", help="куда записать json с результатами")
+    parser.add_argument("--compare", help="json прошлого прогона для сравнения")
+    parser.add_argument("--libraries", type=int, default=40)
+    parser.add_argument("--assets", type=int, default=300)
+    parser.add_argument("--keep", action="store_true", help="не удалять временную папку")
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="echobench-")
+    fixtures_dir = os.path.join(work, "fixtures")
+    home = os.path.join(work, "home")
+    os.makedirs(home)
+    fixtures = make_fixtures(fixtures_dir, libraries=args.libraries, assets=args.assets)
+    server = start_stand_ins(fixtures_dir)
+    base = f"http://{STAND_IN_HOST}:{server.server_port}"
+    # до импорта core: пути данных берутся при импорте
+    os.environ["ECHOLAUNCHER_HOME"] = home
+    install_redirect(base)
+    try:
+        phases = Bench(home, args.runs).run()
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    import core
+    report = {
+        "meta": {"launcher_version": core.LAUNCHER_VERSION, "python": platform.python_version(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "runs": args.runs,
+                 "fixtures": fixtures, "timestamp": time.time()},
+        "phases": phases,
+    }
+    for name, st in phases.items():
+        print(f"{name:<24} p50 {st['p50'] * 1000:8.1f} мс   p90 {st['p90'] * 1000:8.1f} мс   max {st['max'] * 1000:8.1f} мс")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import json, os, threading, time
+from contextlib import contextmanager
+from locking import file_lock, file_stamp
+
+# === Реестр сборок ===
+# builds.json остаётся списком словарей (старые файлы читаются как есть),
+# но в памяти держим индекс по имени и перечитываем файл только когда его
+# поменял кто-то другой (смотрим mtime/размер). Запись - через временный
+# файл и os.replace под файловой блокировкой, чтобы GUI и cli.py,
+# запущенные одновременно, не затирали друг друга и не оставляли обрезанный json.
+
+
+class BuildsStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._lock = threading.RLock()
+        self._builds = []
+        self._index = {}
+        self._stamp = None
+
+    # === Блокировка между процессами ===
+    @contextmanager
+    def _file_lock(self):
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    # === Чтение/запись ===
+    def _file_stamp(self):
+        return file_stamp(self.path)
+
+    def _reload_if_changed(self):
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        builds = []
+        if stamp is not None:
+            with open(self.path, encoding="utf-8") as f:
+                builds = json.load(f)
+        self._builds = builds
+        self._index = {b["name"]: b for b in builds}
+        self._stamp = stamp
+
+    def _write(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._builds, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()
+
+    # === Доступ ===
+    def all(self):
+        with self._lock:
+            self._reload_if_changed()
+            return [dict(b) for b in self._builds]
+
+    def names(self):
+        with self._lock:
+            self._reload_if_changed()
+            return [b["name"] for b in self._builds]
+
+    def get(self, name):
+        with self._lock:
+            self._reload_if_changed()
+            b = self._index.get(name)
+            return dict(b) if b else None
+
+    def add(self, build):
+        with self._file_lock():
+            self._reload_if_changed()
+            if build["name"] in self._index:
+                raise ValueError("Сборка с таким именем уже существует")
+            build = dict(build)
+            self._builds.append(build)
+            self._index[build["name"]] = build
+            self._write()
+            return dict(build)
+
+    def remove(self, name):
+        with self._file_lock():
+            self._reload_if_changed()
+            if name not in self._index:
+                return False
+            del self._index[name]
+            self._builds = [b for b in self._builds if b["name"] != name]
+            self._write()
+            return True
+
+    def update(self, name, **fields):
+        #метаданные сборки: last_launch, install_state, disk_size и т.п.
+        with self._file_lock():
+            self._reload_if_changed()
+            b = self._index.get(name)
+            if b is None:
+                return None
+            b.update(fields)
+            b["updated_at"] = time.time()
+            self._write()
+            return dict(b)
@@ -0,0 +1,324 @@
+import argparse, getpass, sys, time
+import tracing
+tracing.enable_from_argv()      # --trace[=файл] работает у любой команды
+import core
+import jvm_profiles
+
+# === Консольный вход ===
+# То же, что в окне, но без Tk: для скриптов и машин без дисплея.
+#   python cli.py list
+#   python cli.py create <имя> <vanilla|fabric|forge> <версия> [--forge 1.20.1-47.2.0]
+#   python cli.py install <имя> [<имя> ...] | --all [--repair]
+#   python cli.py verify <имя> [<имя> ...] | --all [--no-repair]
+#   python cli.py launch <имя> [--repair] [--wait]
+#   python cli.py ps
+#   python cli.py profile <имя> [--auto | --manual] [--max 4G] [--min 2G] [--gc g1] [--args "..."]
+#   python cli.py clone <имя> <новое имя>
+#   python cli.py export <имя> <файл.tar.gz | ->
+#   python cli.py import <файл.tar.gz | -> [--name <имя>]
+#   python cli.py delete <имя> [<имя> ...]
+#   python cli.py du [--rescan]
+#   python cli.py gc [--dry-run]
+#   python cli.py login <логин>
+# К любой команде можно добавить --trace[=файл] (см. tracing.py).
+
+
+def print_progress(name):
+    #callback для установщиков: печатаем только смену статуса, прогресс слишком частый
+    last = {"status": None}
+    def set_status(text):
+        if text != last["status"]:
+            last["status"] = text
+            print(f"[{name}] {text}", flush=True)
+    return {"setStatus": set_status}
+
+
+def cmd_list(args):
+    builds = core.load_builds()
+    if not builds:
+        print("Сборок нет")
+    for b in builds:
+        print(f"{b['name']}\t{b['type']}\t{b['version']}\t{b.get('install_state', 'not_installed')}")
+    return 0
+
+
+def cmd_create(args):
+    if args.type == "forge" and core.get_forge_index().is_empty():
+        core.refresh_forge_index()
+    core.add_build(args.name, args.version, args.type, args.forge)
+    print(f"Сборка {args.name} создана")
+    return 0
+
+
+def cmd_install(args):
+    names = [b["name"] for b in core.load_builds()] if args.all else args.names
+    if not names:
+        print("Укажите сборки или --all", file=sys.stderr)
+        return 2
+    failed = 0
+    for name in names:
+        build = core.find_build(name)
+        if not build:
+            print(f"[{name}] Сборка не найдена", file=sys.stderr)
+            failed += 1
+            continue
+        try:
+            version_id = core.ensure_installed(build, repair=args.repair, callback=print_progress(name))
+            print(f"[{name}] Готово: {version_id}")
+        except Exception as e:
+            print(f"[{name}] Ошибка установки: {e}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+
+def cmd_verify(args):
+    names = [b["name"] for b in core.load_builds()] if args.all else args.names
+    if not names:
+        print("Укажите сборки или --all", file=sys.stderr)
+        return 2
+    failed = 0
+    for name in names:
+        build = core.find_build(name)
+        if not build:
+            print(f"[{name}] Сборка не найдена", file=sys.stderr)
+            failed += 1
+            continue
+        try:
+            report = core.verify_build(build, repair=not args.no_repair, callback=print_progress(name))
+        except Exception as e:
+            print(f"[{name}] Ошибка проверки: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"[{name}] проверено {report['checked']}, прочитано {report['hashed']}, "
+              f"битых {len(report['bad'])}, исправлено {report['repaired']}")
+        for rel in report["bad"]:
+            print(f"[{name}]   {rel}")
+        if report["bad"] and not report["repaired"]:
+            failed += 1
+    return 1 if failed else 0
+
+
+def cmd_launch(args):
+    if not core.load_session():
+        print("Сначала войдите: python cli.py login <логин>", file=sys.stderr)
+        return 1
+    build = core.find_build(args.name)
+    if not build:
+        print(f"Сборка {args.name} не найдена", file=sys.stderr)
+        return 1
+    #без --wait cli.py сразу выходит, поэтому вывод игры пишется прямо в файл
+    inst = core.launch_build(build, repair=args.repair,
+                             callback=print_progress(args.name), capture=args.wait)
+    print(f"Сборка {args.name} запущена, pid {inst.pid}")
+    if not args.wait:
+        return 0
+    code = inst.wait()
+    if inst.status == "crashed":
+        print(f"[{args.name}] Игра упала, код {code}", file=sys.stderr)
+        for line in inst.tail(30):
+            print(f"[{args.name}]   {line}", file=sys.stderr)
+        if inst.crash_report:
+            print(f"[{args.name}] Отчёт: {inst.crash_report}", file=sys.stderr)
+    return code
+
+
+def cmd_ps(args):
+    import supervisor
+    found = False
+    for b in core.load_builds():
+        info = supervisor.read_running(core.build_dir(b["name"]))
+        if not info:
+            continue
+        found = True
+        rss = supervisor.process_rss(info["pid"])
+        mem = f"{rss // (1024 * 1024)} МБ" if rss else "?"
+        print(f"{b['name']}\tpid {info['pid']}\t{int(time.time() - info['started'])} с\t{mem}\t{info['log']}")
+    if not found:
+        print("Запущенных сборок нет")
+    return 0
+
+
+def cmd_profile(args):
+    build = core.find_build(args.name)
+    if not build:
+        print(f"Сборка {args.name} не найдена", file=sys.stderr)
+        return 1
+    profile = jvm_profiles.profile_for(core.java_config, args.name)
+    changes = {"mode": args.mode, "max_memory": args.max, "min_memory": args.min, "gc": args.gc, "args": args.args}
+    changes = {k: v for k, v in changes.items() if v is not None}
+    if changes:
+        profile.update(changes)
+        jvm_profiles.save_profile(core.java_config, args.name, profile)
+        core.save_java_config(core.java_config)
+    for key in jvm_profiles.PROFILE_KEYS:
+        print(f"{key}\t{profile[key]}")
+    running = sum(1 for b in core.load_builds() if b["name"] != args.name and core.is_build_running(b["name"]))
+    print("JVM:", " ".join(jvm_profiles.resolve(profile, build["type"], running=running)))
+    return 0
+
+
+def cmd_clone(args):
+    build = core.clone_build(args.name, args.new_name, callback=print_progress(args.new_name))
+    print(f"Сборка {build['name']} создана из {args.name}")
+    return 0
+
+
+def cmd_export(args):
+    out = args.file
+    if out == "-":
+        #архив идёт в stdout, поэтому всё остальное печатаем в stderr
+        out, sys.stdout = sys.stdout.buffer, sys.stderr
+    report = core.export_build(args.name, out, callback=print_progress(args.name))
+    print(f"[{args.name}] Экспортировано файлов {report['files']}, "
+          f"уникальных {report['objects']}, {report['bytes'] // (1024 * 1024)} МБ")
+    return 0
+
+
+def cmd_import(args):
+    src = sys.stdin.buffer if args.file == "-" else args.file
+    build = core.import_build(src, name=args.name, callback=print_progress(args.name or "import"))
+    print(f"Сборка {build['name']} импортирована ({build['install_state']})")
+    return 0
+
+
+def cmd_delete(args):
+    failed = 0
+    for name in args.names:
+        if not core.find_build(name):
+            print(f"[{name}] Сборка не найдена", file=sys.stderr)
+            failed += 1
+            continue
+        try:
+            core.delete_build(name)
+            print(f"[{name}] Удалена")
+        except Exception as e:
+            print(f"[{name}] Ошибка удаления: {e}", file=sys.stderr)
+            failed += 1
+    #cli.py ждать фона не может - корзину чистим сразу
+    _, errors = core.purge_trash()
+    if errors:
+        print(f"Не удалось дочистить корзину ({len(errors)} файлов), повторит gc", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_du(args):
+    import diskusage
+    usage = core.disk_usage(rescan=args.rescan)
+    fmt = diskusage.fmt_size
+    for name, entry in sorted(usage["builds"].items(), key=lambda kv: -kv[1]["total"]["bytes"]):
+        total = entry["total"]
+        print(f"{name}\t{fmt(total['bytes'])}\tсвоих {fmt(total['own'])}")
+        for comp, stats in sorted(entry["components"].items(), key=lambda kv: -kv[1]["bytes"]):
+            if stats["bytes"]:
+                print(f"  {comp}\t{fmt(stats['bytes'])}\tсвоих {fmt(stats['own'])}\tфайлов {stats['files']}")
+    for key, stats in usage["shared"].items():
+        print(f"[{key}]\t{fmt(stats['bytes'])}\tфайлов {stats['files']}")
+    return 0
+
+
+def cmd_gc(args):
+    import diskusage
+    report = core.collect_garbage(dry_run=args.dry_run, callback=print_progress("gc"))
+    for category, items in report.items():
+        if items:
+            print(f"{category}\t{len(items)}\t{diskusage.fmt_size(sum(size for _, size in items))}")
+            if args.dry_run:
+                for path, size in items[:20]:
+                    print(f"  {path}\t{diskusage.fmt_size(size)}")
+    return 0
+
+
+def cmd_login(args):
+    pwd = args.password or getpass.getpass("Пароль: ")
+    sess = core.authenticate(args.username, pwd)
+    print(f"Добро пожаловать, {sess['username']}!")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="echolauncher", description="EchoLauncher без окна")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="список сборок").set_defaults(func=cmd_list)
+
+    p = sub.add_parser("create", help="создать сборку")
+    p.add_argument("name")
+    p.add_argument("type", choices=["vanilla", "fabric", "forge"])
+    p.add_argument("version")
+    p.add_argument("--forge", help="версия Forge, по умолчанию recommended/latest")
+    p.set_defaults(func=cmd_create)
+
+    p = sub.add_parser("install", help="установить сборки")
+    p.add_argument("names", nargs="*")
+    p.add_argument("--all", action="store_true", help="все сборки")
+    p.add_argument("--repair", action="store_true", help="проверить и докачать файлы")
+    p.set_defaults(func=cmd_install)
+
+    p = sub.add_parser("verify", help="проверить файлы сборок и починить битые")
+    p.add_argument("names", nargs="*")
+    p.add_argument("--all", action="store_true", help="все сборки")
+    p.add_argument("--no-repair", action="store_true", help="только проверить")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("launch", help="запустить сборку")
+    p.add_argument("name")
+    p.add_argument("--repair", action="store_true", help="проверить и докачать файлы")
+    p.add_argument("--wait", action="store_true", help="ждать завершения игры")
+    p.set_defaults(func=cmd_launch)
+
+    sub.add_parser("ps", help="запущенные сборки").set_defaults(func=cmd_ps)
+
+    p = sub.add_parser("profile", help="показать или изменить профиль JVM сборки")
+    p.add_argument("name")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--auto", dest="mode", action="store_const", const="auto", help="память считается сама")
+    mode.add_argument("--manual", dest="mode", action="store_const", const="manual", help="память из --max/--min")
+    p.add_argument("--max", help="-Xmx, например 4G")
+    p.add_argument("--min", help="-Xms, например 2G")
+    p.add_argument("--gc", choices=sorted(jvm_profiles.GC_PRESETS), help="пресет сборщика мусора")
+    p.add_argument("--args", help="доп. аргументы JVM")
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser("clone", help="копия сборки: общие файлы ссылками, остальное копией")
+    p.add_argument("name")
+    p.add_argument("new_name")
+    p.set_defaults(func=cmd_clone)
+
+    p = sub.add_parser("export", help="выгрузить сборку в .tar.gz")
+    p.add_argument("name")
+    p.add_argument("file", help="путь к архиву, - для stdout")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="загрузить сборку из .tar.gz")
+    p.add_argument("file", help="путь к архиву, - для stdin")
+    p.add_argument("--name", help="новое имя, по умолчанию из архива")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("delete", help="удалить сборки (через корзину)")
+    p.add_argument("names", nargs="+")
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser("du", help="место на диске по сборкам и компонентам")
+    p.add_argument("--rescan", action="store_true", help="пересчитать всё заново")
+    p.set_defaults(func=cmd_du)
+
+    p = sub.add_parser("gc", help="убрать корзину, брошенные версии и файлы без ссылок")
+    p.add_argument("--dry-run", action="store_true", help="только показать, что будет удалено")
+    p.set_defaults(func=cmd_gc)
+
+    p = sub.add_parser("login", help="войти через ely.by")
+    p.add_argument("username")
+    p.add_argument("--password", help="по умолчанию спросит в консоли")
+    p.set_defaults(func=cmd_login)
+
+    args = parser.parse_args(argv)
+    core.ensure_dirs()
+    try:
+        return args.func(args)
+    except Exception as e:
+        print("Ошибка:", e, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,673 @@
+import json, os, re, sys, time, shutil, threading
+import tracing
+
+# === Ядро лаунчера ===
+# Всё, что не касается окна: сессия, сборки, установка и запуск.
+# Тяжёлые модули (requests, minecraft_launcher_lib) импортируются только
+# там, где реально нужны, чтобы GUI и cli.py стартовали быстро.
+
+
+# === Константы ===
+AUTH_URL               = "https://authserver.ely.by/auth/authenticate"            # url с аутентификацией
+REFRESH_URL            = "https://authserver.ely.by/auth/refresh"                 # хз, важная херня
+VALIDATE_URL           = "https://authserver.ely.by/auth/validate"                # проверка, жив ли токен
+
+if getattr(sys, 'frozen', False):
+    LAUNCHER_DIR = os.path.dirname(sys.executable)
+else:
+    LAUNCHER_DIR = os.path.abspath(os.path.dirname(__file__))
+#сборки, сессию и кэши можно увести в другую папку (так bench.py не трогает настоящие данные)
+DATA_DIR = os.path.abspath(os.environ.get("ECHOLAUNCHER_HOME") or LAUNCHER_DIR)
+
+AUTHLIB_INJECTOR_PATH  = os.path.join(LAUNCHER_DIR, "authlib", "authlib-injector-1.2.5.jar")  # путь к AuthLib для ely.by
+GAME_ROOT_DIR          = os.path.join(DATA_DIR, "instances")                      # общая папка игры
+BUILDS_DIR             = os.path.join(GAME_ROOT_DIR, "builds")                    # сюда кладём сборки
+SESSION_DIR            = os.path.join(DATA_DIR, "session")                        # папка сессии
+SESSION_FILE           = os.path.join(SESSION_DIR, "session.json")                # файл сессии
+BUILDS_FILE            = os.path.join(GAME_ROOT_DIR, "builds.json")               # файл сборок
+STORE_DIR              = os.path.join(GAME_ROOT_DIR, "store")                     # общее хранилище библиотек/ассетов/рантаймов
+JAVA_CONFIG_FILE       = os.path.join(DATA_DIR, "java_config.json")               # конфиг жавы, там сохраняются указанные параметры
+MANIFEST_CACHE_FILE    = os.path.join(DATA_DIR, "manifest_cache.json")            # кэш списков версий, чтобы не ждать сеть при старте
+RUNTIME_DIR            = os.path.join(GAME_ROOT_DIR, "runtime")                   # общие рантаймы жавы для всех сборок
+RUNTIME_CACHE_FILE     = os.path.join(GAME_ROOT_DIR, "runtime_cache.json")        # кэш `java -version` по пути и mtime
+FORGE_INDEX_FILE       = os.path.join(DATA_DIR, "forge_index.json")               # все версии forge по версиям minecraft
+FORGE_CACHE_FILE       = os.path.join(DATA_DIR, "forge_cache.json")               # сырые promos/maven-metadata с ETag
+TRASH_DIR              = os.path.join(GAME_ROOT_DIR, "trash")                     # удалённые сборки до фоновой очистки
+DISK_INDEX_FILE        = os.path.join(GAME_ROOT_DIR, "disk_usage.json")           # место по сборкам и компонентам
+LAUNCHER_NAME          = "EchoLauncher"
+LAUNCHER_VERSION       = "1.1"
+
+
+#создаём папки, если надо
+def ensure_dirs():
+    os.makedirs(GAME_ROOT_DIR, exist_ok=True)
+    os.makedirs(BUILDS_DIR, exist_ok=True)
+    os.makedirs(SESSION_DIR, exist_ok=True)
+
+
+#получаем путь к жаве: общий рантайм нужного компонента, при необходимости ставим его
+@tracing.traced()
+def get_java_path(build_path, version_id, callback=None):
+    return get_runtime_registry().get_java(build_path, version_id, callback)
+
+
+# === Java конфиг ===
+#загрузка конфига жавы
+def load_java_config():
+    if not os.path.isfile(JAVA_CONFIG_FILE):
+        return {"memory": "2G", "args": "", "profiles": {}}
+    with open(JAVA_CONFIG_FILE, encoding="utf-8") as f:
+        return json.load(f)
+#сохранение конфига
+def save_java_config(cfg):
+    with open(JAVA_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False, indent=2)
+
+java_config = load_java_config()
+
+
+# === Общие объекты, создаются при первом обращении ===
+_singletons = {}
+_singletons_lock = threading.RLock()   # RLock: фабрика качалки сама берёт хранилище
+
+def _singleton(name, factory):
+    with _singletons_lock:
+        if name not in _singletons:
+            _singletons[name] = factory()
+        return _singletons[name]
+
+def get_content_store():
+    import store
+    return _singleton("store", lambda: store.ContentStore(STORE_DIR))
+
+def get_manifest_cache():
+    import manifests
+    return _singleton("manifests", lambda: manifests.ManifestCache(
+        MANIFEST_CACHE_FILE, ttl=java_config.get("manifest_ttl", manifests.DEFAULT_TTL)))
+
+def get_downloader():
+    # одна качалка на весь лаунчер: общий пул соединений и общее хранилище
+    import downloader
+    return _singleton("downloader", lambda: downloader.Downloader(
+        workers=java_config.get("download_workers", 16), store=get_content_store()))
+
+def get_builds_store():
+    import builds_store
+    return _singleton("builds", lambda: builds_store.BuildsStore(BUILDS_FILE))
+
+def get_runtime_registry():
+    import runtimes
+    return _singleton("runtimes", lambda: runtimes.RuntimeRegistry(RUNTIME_DIR, RUNTIME_CACHE_FILE))
+
+def get_auth_client():
+    import auth
+    return _singleton("auth", lambda: auth.AuthClient(AUTH_URL, REFRESH_URL, VALIDATE_URL, SESSION_FILE))
+
+def get_command_cache():
+    import launch_cache
+    return _singleton("commands", launch_cache.CommandCache)
+
+def get_forge_index():
+    import forge_index, manifests
+    return _singleton("forge", lambda: forge_index.ForgeIndex(FORGE_INDEX_FILE, manifests.ManifestCache(
+        FORGE_CACHE_FILE, ttl=java_config.get("manifest_ttl", manifests.DEFAULT_TTL))))
+
+def get_supervisor():
+    import supervisor
+    return _singleton("supervisor", supervisor.Supervisor)
+
+def get_disk_index():
+    import diskusage
+    return _singleton("disk", lambda: diskusage.DiskIndex(DISK_INDEX_FILE))
+
+
+# === Доступные версии Minecraft ===
+# сначала берём то, что лежит в кэше, а свежие списки подтягиваются в фоне
+vanilla_version_ids = []
+fabric_version_ids  = []
+
+@tracing.traced()
+def load_cached_version_lists():
+    global vanilla_version_ids, fabric_version_ids
+    import manifests
+    cache = get_manifest_cache()
+    #ванилла
+    vanilla_version_ids = manifests.vanilla_ids(cache.get_cached(manifests.VANILLA_MANIFEST_URL))
+    #фарбик
+    fabric_version_ids  = manifests.fabric_ids(cache.get_cached(manifests.FABRIC_GAME_URL))
+
+@tracing.traced()
+def refresh_version_lists():
+    global vanilla_version_ids, fabric_version_ids
+    import manifests
+    cache = get_manifest_cache()
+    try:
+        vanilla_version_ids = manifests.vanilla_ids(cache.fetch(manifests.VANILLA_MANIFEST_URL))
+    except Exception as e:
+        print("[Manifest] Не удалось обновить список ванильных версий:", e)
+    try:
+        fabric_version_ids = manifests.fabric_ids(cache.fetch(manifests.FABRIC_GAME_URL))
+    except Exception as e:
+        print("[Manifest] Не удалось обновить список версий Fabric:", e)
+    refresh_forge_index()
+
+def start_version_refresh():
+    threading.Thread(target=refresh_version_lists, daemon=True).start()
+
+
+@tracing.traced()
+def prefetch_version(mc_version, game_dir, callback=None):
+    #заранее параллельно качаем ванильную часть версии, установщики потом только проверят хэши
+    import manifests
+    try:
+        manifest = get_manifest_cache().fetch(manifests.VANILLA_MANIFEST_URL)
+    except Exception as e:
+        print("[Download] Манифест недоступен, качает установщик:", e)
+        return
+    get_downloader().prefetch_version(mc_version, game_dir, manifest, callback)
+
+
+#версии Minecraft с Forge - из индекса на диске, сеть не трогаем
+def forge_mc_versions():
+    return get_forge_index().mc_versions()
+
+def refresh_forge_index(force=False):
+    try:
+        get_forge_index().refresh(force)
+    except Exception as e:
+        print("[Forge] Не удалось обновить индекс версий:", e)
+
+
+# === Сессия ===
+#загрузка сесии (из памяти клиента, с диска читается один раз)
+def load_session():
+    return get_auth_client().current()
+
+
+# === Сборки ===
+def build_dir(name):
+    return os.path.join(BUILDS_DIR, name)
+
+#загрузка существующих сборок
+def load_builds():
+    return get_builds_store().all()
+#поиск сборки по имени
+def find_build(name):
+    return get_builds_store().get(name)
+#создание сборки
+#loader_version - конкретная версия forge ("1.20.1-47.2.0"); None - recommended/latest из индекса
+def add_build(name, mc_version, mc_type, loader_version=None):
+    build = {"name": name, "version": mc_version, "type": mc_type, "install_state": "not_installed"}
+    if mc_type == "forge":
+        loader_version = loader_version or get_forge_index().pick(mc_version)
+        if loader_version:
+            build["loader_version"] = loader_version
+    build = get_builds_store().add(build)
+    # создаём папку
+    os.makedirs(build_dir(name), exist_ok=True)
+    return build
+#убираем сборку из списка, папку уносит delete_build
+def remove_build(name):
+    get_builds_store().remove(name)
+#метаданные сборки (last_launch, install_state, disk_size)
+def update_build(name, **fields):
+    return get_builds_store().update(name, **fields)
+
+#пересчёт места сборки: only - какие компоненты трогали, skip - какие точно не менялись
+def account_build(name, only=None, skip=()):
+    usage = get_disk_index().update_build(name, build_dir(name), only, skip)
+    update_build(name, disk_size=usage["bytes"])
+    return usage
+
+#удаление: папка сразу уезжает в корзину, а чистит её purge_trash (в фоне)
+def delete_build(name):
+    import diskusage
+    if is_build_running(name):
+        raise Exception(f"Сборка {name} запущена, сначала закройте игру")
+    game_dir = build_dir(name)
+    if os.path.lexists(game_dir):
+        diskusage.move_to_trash(game_dir, TRASH_DIR)
+    remove_build(name)
+    get_disk_index().add_shared("trash", get_disk_index().forget_build(name))
+
+@tracing.traced()
+def purge_trash():
+    import diskusage
+    removed, failed = diskusage.purge_trash(TRASH_DIR)
+    get_disk_index().set_shared("trash", diskusage.scan(TRASH_DIR))
+    return removed, failed
+
+
+# === Копия / экспорт / импорт сборки ===
+def _check_build_name(name):
+    #имя сборки - это имя папки, тем более если оно пришло из чужого архива
+    if not name or name in (".", "..") or any(c in name for c in '/\\:'):
+        raise ValueError(f"Недопустимое название сборки: {name!r}")
+    if find_build(name):
+        raise ValueError("Сборка с таким именем уже существует")
+
+#регистрируем уже разложенную папку как сборку, вместе с профилем JVM
+def _register_copy(name, fields, profile):
+    import stamps
+    game_dir = build_dir(name)
+    get_runtime_registry().link_build(game_dir)
+    stamp = stamps.read_stamp(game_dir)
+    build = dict(fields, name=name, install_state="installed" if stamp else "not_installed")
+    if stamp:
+        build["version_id"] = stamp["version_id"]
+    try:
+        get_builds_store().add(build)
+    except BaseException:
+        shutil.rmtree(game_dir, ignore_errors=True)
+        raise
+    if profile:
+        java_config.setdefault("profiles", {})[name] = dict(profile)
+        save_java_config(java_config)
+    account_build(name)
+    return find_build(name)
+
+#копия сборки: библиотеки/ассеты/jar - ссылками, конфиги, миры и моды - копией
+@tracing.traced()
+def clone_build(name, new_name, callback=None):
+    import transfer
+    src = find_build(name)
+    if not src:
+        raise Exception(f"Сборка {name} не найдена")
+    if is_build_running(name):
+        raise Exception(f"Сборка {name} запущена, закройте игру перед копированием")
+    _check_build_name(new_name)
+    transfer.clone_build(build_dir(name), build_dir(new_name), get_content_store(), callback)
+    fields = {k: v for k, v in src.items() if k in transfer.BUILD_FIELDS}
+    return _register_copy(new_name, fields, java_config.get("profiles", {}).get(name))
+
+#out - путь к .tar.gz или бинарный поток
+@tracing.traced()
+def export_build(name, out, callback=None):
+    import transfer
+    build = find_build(name)
+    if not build:
+        raise Exception(f"Сборка {name} не найдена")
+    if is_build_running(name):
+        raise Exception(f"Сборка {name} запущена, закройте игру перед экспортом")
+    return transfer.export_build(build_dir(name), build, out, get_content_store(),
+                                 profile=java_config.get("profiles", {}).get(name), callback=callback)
+
+#src - путь к архиву или бинарный поток; name=None - имя из архива
+@tracing.traced()
+def import_build(src, name=None, callback=None):
+    import transfer
+    chosen = {}
+
+    def choose_dir(manifest):
+        info = manifest.get("build", {})
+        if info.get("type") not in ("vanilla", "fabric", "forge") or not info.get("version"):
+            raise ValueError("В архиве нет описания сборки")
+        chosen["name"] = name or info.get("name")
+        _check_build_name(chosen["name"])
+        return build_dir(chosen["name"])
+
+    manifest, _ = transfer.import_build(src, get_content_store(), choose_dir, callback)
+    fields = {k: v for k, v in manifest["build"].items() if k in transfer.BUILD_FIELDS}
+    return _register_copy(chosen["name"], fields, manifest.get("profile"))
+
+
+# === Авторизация ===
+@tracing.traced()
+def authenticate(user, pwd):
+    #вход по логину и паролю, сессия сразу сохраняется
+    return get_auth_client().login(user, pwd)
+
+@tracing.traced()
+def refresh_session():
+    return get_auth_client().refresh()
+
+#проверка токена в фоне при старте, чтобы к запуску всё было готово
+def validate_session_in_background():
+    if load_session():
+        get_auth_client().validate_in_background()
+
+
+# === Установка версий (vanilla / fabric / forge) ===
+#убеждаемся в том, что сборка установлена
+#repair=True - игнорируем отметку об установке и заново прогоняем установщики (они докачают битое)
+#callback - dict setStatus/setMax/setProgress, как у установщиков minecraft_launcher_lib
+@tracing.traced()
+def ensure_installed(build, repair=False, callback=None):
+    import stamps, diskusage
+    game_dir = build_dir(build["name"])
+    build = _pin_forge_version(build, game_dir)
+
+    #быстрый путь: сборка уже ставилась и файлы на месте - сеть не трогаем
+    if not repair:
+        version_id = stamps.check_stamp(game_dir, build)
+        if version_id:
+            return version_id
+
+    update_build(build["name"], install_state="installing")
+    try:
+        version_id, loader_version = _run_installers(build, game_dir, repair, callback)
+    except BaseException:
+        update_build(build["name"], install_state="failed")
+        raise
+
+    stamps.write_stamp(game_dir, build, version_id, loader_version)
+    fields = {"loader_version": loader_version} if build["type"] == "forge" else {}
+    update_build(build["name"], install_state="installed", version_id=version_id, **fields)
+    account_build(build["name"], only=diskusage.INSTALL_COMPONENTS)
+    #возвращаем важную херобору, тронете - убью
+    return version_id
+
+
+# === Forge: какая версия стоит у сборки ===
+#"1.20.1-47.2.0" -> "1.20.1-forge-47.2.0", под этим id установщик кладёт версию
+def _forge_installed_id(forge_version):
+    mc, _, forge = forge_version.partition("-")
+    return f"{mc}-forge-{forge}"
+
+#обратно: id из versions/ -> версия forge ("1.7.10-Forge10.13.4.1614-1.7.10" -> "1.7.10-10.13.4.1614-1.7.10")
+def _forge_version_from_id(version_id, mc_version):
+    m = re.match(rf"{re.escape(mc_version)}-forge-?(.+)$", version_id, re.IGNORECASE)
+    return f"{mc_version}-{m.group(1)}" if m else None
+
+#forge-сборки, созданные до закрепления версии, ставились с самой новой forge;
+#при первом обращении записываем в builds.json то, что стоит на самом деле,
+#чтобы починка не поставила рядом другую версию
+def _pin_forge_version(build, game_dir):
+    import stamps
+    if build["type"] != "forge" or build.get("loader_version"):
+        return build
+    stamp = stamps.read_stamp(game_dir) or {}
+    forge_version = stamp.get("loader_version")
+    if not forge_version and stamp.get("version_id"):
+        forge_version = _forge_version_from_id(stamp["version_id"], build["version"])
+    if not forge_version:
+        versions_dir = os.path.join(game_dir, "versions")
+        for ver_id in sorted(os.listdir(versions_dir), reverse=True) if os.path.isdir(versions_dir) else ():
+            forge_version = _forge_version_from_id(ver_id, build["version"])
+            if forge_version:
+                break
+    if not forge_version:
+        forge_version = get_forge_index().newest(build["version"])
+    if not forge_version:
+        return build
+    print(f"[Forge] {build['name']}: закрепляем версию {forge_version}")
+    return update_build(build["name"], loader_version=forge_version) or dict(build, loader_version=forge_version)
+
+
+#сами установщики; возвращает (version_id, версия загрузчика)
+def _run_installers(build, game_dir, repair, callback):
+    mc_version = build["version"]
+    mc_type = build["type"]
+    version_id = None
+    loader_version = None
+
+    import minecraft_launcher_lib
+    from minecraft_launcher_lib import utils, install
+    from minecraft_launcher_lib.fabric import install_fabric
+    content_store = get_content_store()
+    #рантайм жавы ставится в общую папку, а не в каждую сборку
+    get_runtime_registry().link_build(game_dir)
+
+    versions_dir = os.path.join(game_dir, "versions")
+    if not os.path.exists(versions_dir):
+        os.makedirs(versions_dir)
+
+    #когда версия уже установлена
+    def version_installed(ver_id):
+        return os.path.isfile(os.path.join(versions_dir, ver_id, ver_id + ".json"))
+
+    #если ванилла
+    if mc_type == "vanilla":
+        version_id = mc_version
+        if repair or not version_installed(version_id):
+            content_store.populate(game_dir, mc_version)
+            prefetch_version(mc_version, game_dir, callback)
+            with tracing.span("install_minecraft_version", version=mc_version):
+                install.install_minecraft_version(mc_version, game_dir, callback=callback)
+            content_store.absorb(game_dir, mc_version)
+
+    #если фабрик
+    elif mc_type == "fabric":
+        content_store.populate(game_dir, mc_version)
+        prefetch_version(mc_version, game_dir, callback)
+        with tracing.span("install_minecraft_version", version=mc_version):
+            install.install_minecraft_version(mc_version, game_dir, callback=callback)
+        with tracing.span("install_fabric", version=mc_version):
+            install_fabric(mc_version, game_dir, callback=callback)
+        content_store.absorb(game_dir, mc_version)
+        version_id = None
+        for d in os.listdir(versions_dir):
+            if d.endswith(f"-{mc_version}") and "fabric-loader" in d:
+                version_id = d
+                break
+        if not version_id:
+            raise Exception("Не удалось найти установленную Fabric версию")
+        # fabric-loader-<loader>-<mc>
+        loader_version = version_id[len("fabric-loader-"):-len(mc_version) - 1]
+
+    #если форж
+    elif mc_type == "forge":
+        # версия forge закреплена за сборкой (см. _pin_forge_version), иначе - самая новая, как раньше
+        forge_version = build.get("loader_version") or get_forge_index().newest(mc_version)
+        if forge_version is None:
+            #индекс пустой или устарел - это единственный случай, когда идём в сеть
+            get_forge_index().refresh(force=True)
+            forge_version = get_forge_index().newest(mc_version)
+        if forge_version is None:
+            raise Exception(f"Forge не поддерживает версию {mc_version}")
+
+        if not minecraft_launcher_lib.forge.supports_automatic_install(forge_version):
+            raise Exception(f"Автоматическая установка Forge {forge_version} не поддерживается")
+
+        content_store.populate(game_dir, mc_version)
+        prefetch_version(mc_version, game_dir, callback)
+        with tracing.span("install_forge_version", version=forge_version):
+            minecraft_launcher_lib.forge.install_forge_version(forge_version, game_dir, callback=callback)
+        content_store.absorb(game_dir, mc_version)
+
+        # Найдём установленную версию: сначала точный id этой forge, потом поиск по versions/*
+        if version_installed(_forge_installed_id(forge_version)):
+            version_id = _forge_installed_id(forge_version)
+        else:
+            ids = [v["id"] for v in utils.get_installed_versions(game_dir)
+                   if mc_version in v["id"] and "forge" in v["id"].lower()]
+            exact = [i for i in ids if _forge_version_from_id(i, mc_version) == forge_version]
+            #если id нестандартный, берём его только когда forge в сборке одна - иначе можно схватить чужую
+            if exact or len(ids) == 1:
+                version_id = (exact or ids)[0]
+            else:
+                raise Exception("Forge установлен, но не удалось найти его ID")
+        loader_version = forge_version
+
+    return version_id, loader_version
+
+
+# === Проверка/починка ===
+#сверяем файлы сборки с хэшами из version json и перекачиваем битые
+@tracing.traced()
+def verify_build(build, repair=True, callback=None):
+    import stamps, verify, diskusage
+    if repair and is_build_running(build["name"]):
+        raise Exception(f"Сборка {build['name']} запущена, закройте игру перед починкой")
+    game_dir = build_dir(build["name"])
+    stamp = stamps.read_stamp(game_dir)
+    if not stamp:
+        raise Exception(f"Сборка {build['name']} ещё не установлена")
+    report = verify.verify_build(game_dir, stamp["version_id"], get_downloader(),
+                                 get_runtime_registry(), repair=repair, callback=callback)
+    if report["repaired"]:
+        account_build(build["name"], only=diskusage.INSTALL_COMPONENTS)
+    return report
+
+
+# === Запуск ===
+#запущен ли клиент сборки - этим лаунчером или другим (cli.py, второе окно)
+def is_build_running(name):
+    import supervisor
+    inst = get_supervisor().get(name)
+    if inst and inst.returncode is None:
+        return True
+    return supervisor.read_running(build_dir(name)) is not None
+
+#jvm_settings - профиль JVM ({"mode", "max_memory", "min_memory", "gc", "args"}),
+#               None - профиль сборки из java_config (см. jvm_profiles)
+#sess=None - берём сохранённую сессию, перед запуском проверяем/обновляем токен
+@tracing.traced()
+def launch_build(build, jvm_settings=None, sess=None, repair=False, callback=None, capture=True, on_exit=None):
+    #возвращает supervisor.Instance; capture=False - вывод игры сразу в лог-файл (для cli без --wait)
+    get_supervisor().check_not_running(build["name"], build_dir(build["name"]))
+    if sess is None:
+        sess = get_auth_client().ensure_valid()
+
+    #Убеждаемся в установке версии, если нету - качаем
+    version_id = ensure_installed(build, repair=repair, callback=callback)
+    if not version_id:
+        raise Exception("Не удалось установить версию Minecraft для сборки")
+
+    #Путь к сборке
+    build_path = build_dir(build["name"])
+    #Получаем путь к жаве через функцию в начале
+    java_path = get_java_path(build_path, version_id, callback)
+
+    import jvm_profiles
+    if jvm_settings is None:
+        jvm_settings = jvm_profiles.profile_for(java_config, build["name"])
+    #память в режиме auto делим с уже запущенными клиентами
+    running = sum(1 for b in load_builds() if b["name"] != build["name"] and is_build_running(b["name"]))
+    jvm_args = jvm_profiles.resolve(jvm_settings, build["type"],
+                                    get_runtime_registry().probe(java_path), running)
+
+    #Параметры запуска
+    options = {
+        "username": sess["username"],                                        #ник
+        "uuid": sess["uuid"],                                                #uuid
+        "token": sess["accessToken"],                                        #токен
+        "jvmArguments": [                                                    #аргументы жавы
+            f"-javaagent:{AUTHLIB_INJECTOR_PATH}=https://authserver.ely.by"  #говорим жаве заходить через ely.by
+        ] + jvm_args,
+        "launcherName": LAUNCHER_NAME,                                       #говорим название нашего лаунчера
+        "launcherVersion": LAUNCHER_VERSION,                                 #версию
+        "gameDirectory": build_path,               #директорию игры(сборки)
+        "executablePath": java_path,                                         #путь к жаве
+    }
+    #Если нету жавы, жалуемся
+    if not os.path.isfile(java_path):
+        raise FileNotFoundError(f"Не найден файл Java: {java_path}")
+
+    if callback:
+        callback.get("setStatus", lambda _: None)("Запуск")
+    #classpath и аргументы берём из кэша, подставляются только сессия и JVM
+    cmd = get_command_cache().get_command(
+        version_id,
+        build_path,
+        options
+    )
+    import diskusage
+    def exited(inst):
+        #игра могла понаписать миров, логов и скриншотов - пересчитываем всё, кроме установленного
+        try:
+            account_build(build["name"], skip=diskusage.STATIC_COMPONENTS)
+        finally:
+            if on_exit:
+                on_exit(inst)
+    inst = get_supervisor().launch(build["name"], build_path, cmd, capture=capture, on_exit=exited)
+    update_build(build["name"], last_launch=time.time())
+    return inst
+
+
+# === Место на диске и сборка мусора ===
+#отчёт для окна и cli: сборки по компонентам + хранилище, рантаймы, корзина
+@tracing.traced()
+def disk_usage(rescan=False):
+    import diskusage
+    index = get_disk_index()
+    names = set()
+    for b in load_builds():
+        name = b["name"]
+        names.add(name)
+        if rescan or not index.has_build(name):
+            account_build(name)
+        elif b.get("last_launch", 0) > index.updated(name) and not is_build_running(name):
+            #игру запускал cli.py без --wait, выход никто не видел - досчитываем сейчас
+            account_build(name, skip=diskusage.STATIC_COMPONENTS)
+    for name in index.build_names():
+        if name not in names:
+            index.forget_build(name)
+    for key, path in (("store", STORE_DIR), ("runtime", RUNTIME_DIR), ("trash", TRASH_DIR)):
+        if rescan or not index.has_shared(key):
+            index.set_shared(key, diskusage.scan(path))
+    return index.snapshot()
+
+#фоновая уборка: корзина, брошенные versions/<id>, недокачанные и временные файлы,
+#объекты хранилища и рантаймы, на которые не ссылается ни одна сборка
+#возвращает {категория: [(путь, байт)]}; dry_run - только показать
+@tracing.traced()
+def collect_garbage(dry_run=False, callback=None):
+    import diskusage, stamps
+    set_status = (callback or {}).get("setStatus", lambda _: None)
+    index = get_disk_index()
+    report = {"trash": [], "versions": [], "leftovers": [], "objects": [], "runtimes": []}
+
+    builds = load_builds()
+    now = time.time()
+    #пока что-то ставится (здесь или в другом процессе), файлы ещё не записаны в хранилище - не трогаем
+    installing = [b["name"] for b in builds if b.get("install_state") == "installing"
+                  and now - b.get("updated_at", 0) < diskusage.STALE_AGE]
+
+    #папки сборок, которых нет в списке, не трогаем: там могут быть чужие миры и сохранения
+    set_status("Очистка корзины")
+    report["trash"] = [(os.path.join(TRASH_DIR, slot), diskusage.scan(os.path.join(TRASH_DIR, slot))["own"])
+                       for slot in (os.listdir(TRASH_DIR) if os.path.isdir(TRASH_DIR) else ())]
+    if not dry_run:
+        purge_trash()
+    if installing:
+        print(f"[GC] Идёт установка ({', '.join(installing)}), чистим только корзину")
+        return report
+
+    set_status("Поиск лишних файлов")
+    keep_runtimes, runtimes_known = set(), True
+    for b in builds:
+        name = b["name"]
+        game_dir = build_dir(name)
+        running = is_build_running(name)
+        if not running:
+            report["leftovers"] += [item for top in diskusage.INSTALL_COMPONENTS
+                                    for item in diskusage.stale_leftovers(os.path.join(game_dir, top), now)]
+        stamp = stamps.read_stamp(game_dir)
+        if not stamp:
+            continue
+        try:
+            keep_runtimes.add(get_runtime_registry().required(game_dir, stamp["version_id"])[0])
+            orphans = [] if running else diskusage.orphan_versions(game_dir, stamp["version_id"])
+        except (OSError, ValueError, KeyError) as e:
+            #version json пропал - сборку починит verify, а рантаймы на этот раз не трогаем
+            print(f"[GC] {name}: пропускаем, версия не читается: {e}")
+            runtimes_known = False
+            continue
+        report["versions"] += orphans
+        if orphans and not dry_run:
+            for path, _ in orphans:
+                diskusage.remove_tree(path)
+            account_build(name, only=("versions",))
+    report["leftovers"] += diskusage.stale_leftovers(STORE_DIR, now) + diskusage.stale_forge_temp(now)
+    if not dry_run:
+        for path, _ in report["leftovers"]:
+            try:
+                if os.path.isdir(path):
+                    diskusage.remove_tree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                print(f"[GC] Не удалось удалить {path}: {e}")
+
+    set_status("Очистка хранилища")
+    report["objects"] = get_content_store().collect({b["version"] for b in builds}, dry_run=dry_run)
+    if runtimes_known:
+        report["runtimes"] = get_runtime_registry().collect(keep_runtimes, dry_run=dry_run)
+
+    if not dry_run:
+        index.set_shared("store", diskusage.scan(STORE_DIR))
+        index.set_shared("runtime", diskusage.scan(RUNTIME_DIR))
+    freed = sum(size for items in report.values() for _, size in items)
+    print(f"[GC] {'Можно освободить' if dry_run else 'Освобождено'} {diskusage.fmt_size(freed)}")
+    return report
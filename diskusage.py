@@ -0,0 +1,326 @@
+import os, re, sys, json, time, stat, shutil, tempfile, threading
+from contextlib import contextmanager
+import stamps
+import tracing
+from runtimes import is_dir_link, unlink_dir_link
+from locking import file_lock, file_stamp
+
+# === Место на диске ===
+# disk_usage.json: размер каждой сборки по компонентам (versions, libraries,
+# mods, saves, ...) и общих папок (хранилище, рантаймы, корзина). Операции
+# пересчитывают только то, что трогали: установка - versions/libraries/assets,
+# выход из игры - всё остальное, удаление просто убирает запись; целиком
+# обходится только сборка, которой в индексе ещё нет. "own" - сколько
+# освободится при удалении сборки: файлы с hardlink на объект хранилища не в счёт.
+# Удаление сборки - переименование в trash/ (мгновенно), а сама очистка идёт
+# в фоне; то, что не удалилось, подберёт следующая сборка мусора.
+# Файл общий для окна и cli.py: запись - под файловой блокировкой, после
+# перечитывания, чтобы не затереть то, что посчитал другой процесс.
+
+ROOT_FILES         = "."          # компонент для файлов в корне сборки
+STATIC_COMPONENTS  = ("versions", "libraries", "assets")              # игра их не меняет
+INSTALL_COMPONENTS = STATIC_COMPONENTS + (stamps.META_DIR,)           # что трогает установка/починка
+STALE_AGE          = 24 * 60 * 60                                     # брошенным считаем то, что не менялось сутки
+LEFTOVER_RE        = re.compile(r"(\.part|\.\d+\.lnk)$")               # .part загрузчика, <файл>.<поток>.lnk хранилища
+FORGE_TEMP_PREFIXES = ("minecraft-launcher-lib-forge-install-", "minecraft-launcher-lib-forge-installer-")
+
+
+def fmt_size(size):
+    for unit, factor in (("ГБ", 1 << 30), ("МБ", 1 << 20), ("КБ", 1 << 10)):
+        if size >= factor:
+            return f"{size / factor:.1f} {unit}"
+    return f"{size} Б"
+
+
+def _empty():
+    return {"bytes": 0, "own": 0, "files": 0}
+
+
+def _add_file(stats, st):
+    stats["files"] += 1
+    stats["bytes"] += st.st_size
+    if st.st_nlink <= 1:
+        stats["own"] += st.st_size
+
+
+def _file_stat(entry):
+    #у scandir на windows st_nlink всегда 0, там честный lstat
+    return os.lstat(entry.path) if os.name == "nt" else entry.stat(follow_symlinks=False)
+
+
+def scan(path):
+    #{"bytes", "own", "files"} по дереву, по ссылкам на папки не ходим
+    stats = _empty()
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_dir_link(entry.path):
+                            stack.append(entry.path)
+                        continue
+                    _add_file(stats, _file_stat(entry))
+                except OSError:
+                    pass
+    return stats
+
+
+def scan_build(game_dir, only=None, skip=()):
+    #{компонент: stats} по папкам верхнего уровня; файлы из корня - компонент "."
+    result = {}
+    root = _empty()
+    try:
+        entries = list(os.scandir(game_dir))
+    except OSError:
+        return result
+    for entry in entries:
+        try:
+            if entry.is_symlink() or is_dir_link(entry.path):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in skip and (only is None or entry.name in only):
+                    result[entry.name] = scan(entry.path)
+            else:
+                _add_file(root, _file_stat(entry))
+        except OSError:
+            pass
+    if ROOT_FILES not in skip and (only is None or ROOT_FILES in only):
+        result[ROOT_FILES] = root
+    return result
+
+
+def totals(components):
+    total = _empty()
+    for stats in components.values():
+        for key in total:
+            total[key] += stats.get(key, 0)
+    return total
+
+
+class DiskIndex:
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._data = {}
+        self._reload_if_changed()
+
+    def _reload_if_changed(self):
+        #под self._lock или в __init__
+        stamp = file_stamp(self.path)
+        if stamp is not None and stamp == self._stamp:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+        self._data.setdefault("builds", {})
+        self._data.setdefault("shared", {})
+        self._stamp = stamp
+
+    @contextmanager
+    def _writing(self):
+        #перечитали под блокировкой -> поменяли -> сохранили
+        with self._lock, file_lock(self.lock_path):
+            self._reload_if_changed()
+            yield
+            self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._stamp = file_stamp(self.path)
+
+    # === Сборки ===
+    def has_build(self, name):
+        with self._lock:
+            self._reload_if_changed()
+            return name in self._data["builds"]
+
+    def updated(self, name):
+        with self._lock:
+            self._reload_if_changed()
+            return self._data["builds"].get(name, {}).get("updated", 0)
+
+    def build_names(self):
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._data["builds"])
+
+    def update_build(self, name, game_dir, only=None, skip=()):
+        #пересчитываем только перечисленные компоненты (only=None - все, кроме skip), пропавшие убираем
+        if not self.has_build(name):
+            only, skip = None, ()
+        with tracing.span("disk scan", build=name):
+            fresh = scan_build(game_dir, only, skip)
+        with self._writing():
+            entry = self._data["builds"].setdefault(name, {"components": {}})
+            components = entry["components"]
+            for comp in list(components):
+                if comp not in skip and (only is None or comp in only) and comp not in fresh:
+                    del components[comp]
+            components.update(fresh)
+            entry["updated"] = time.time()
+            usage = totals(components)
+        return usage
+
+    def forget_build(self, name):
+        #итог удалённой записи - он уходит в корзину
+        with self._writing():
+            entry = self._data["builds"].pop(name, None)
+        return totals(entry["components"]) if entry else _empty()
+
+    # === Общие папки: store, runtime, trash ===
+    def set_shared(self, key, stats):
+        with self._writing():
+            self._data["shared"][key] = stats
+
+    def add_shared(self, key, stats):
+        with self._writing():
+            shared = self._data["shared"].setdefault(key, _empty())
+            for k in stats:
+                shared[k] = shared.get(k, 0) + stats[k]
+
+    def has_shared(self, key):
+        with self._lock:
+            self._reload_if_changed()
+            return key in self._data["shared"]
+
+    def snapshot(self):
+        #{"builds": {имя: {"total", "components"}}, "shared": {ключ: stats}}
+        with self._lock:
+            self._reload_if_changed()
+            builds = {name: {"total": totals(e["components"]), "components": dict(e["components"]),
+                             "updated": e.get("updated", 0)}
+                      for name, e in self._data["builds"].items()}
+            return {"builds": builds, "shared": dict(self._data["shared"])}
+
+
+# === Корзина ===
+_purging = set()
+_purging_lock = threading.Lock()
+
+
+def move_to_trash(path, trash_dir):
+    #"удаление" за миг: переименование в trash/ на том же диске; путь ячейки корзины
+    os.makedirs(trash_dir, exist_ok=True)
+    slot = tempfile.mkdtemp(prefix=os.path.basename(path) + "-", dir=trash_dir)
+    os.replace(path, os.path.join(slot, os.path.basename(path)))
+    return slot
+
+
+def remove_tree(path):
+    #rmtree без ignore_errors: read-only снимаем и пробуем ещё раз, остальное возвращаем списком
+    errors = []
+
+    def retry(func, p, exc):
+        if isinstance(exc, FileNotFoundError):
+            return
+        try:
+            os.chmod(p, stat.S_IWRITE | stat.S_IREAD)
+            func(p)
+        except OSError as e:
+            errors.append((p, e))
+
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=retry)
+    else:
+        shutil.rmtree(path, onerror=lambda func, p, info: retry(func, p, info[1]))
+    return errors
+
+
+def purge_trash(trash_dir):
+    #(удалено ячеек, [(путь, ошибка)]); ячейку, которую уже чистит другой поток, пропускаем
+    removed, failed = 0, []
+    try:
+        slots = os.listdir(trash_dir)
+    except FileNotFoundError:
+        return removed, failed
+    for slot in slots:
+        path = os.path.join(trash_dir, slot)
+        with _purging_lock:
+            if path in _purging:
+                continue
+            _purging.add(path)
+        try:
+            # ссылку сборки на общий рантайм снимаем первой, чтобы не уйти по ней в общую папку
+            for child in os.listdir(path) if os.path.isdir(path) else ():
+                link = os.path.join(path, child, "runtime")
+                if is_dir_link(link):
+                    unlink_dir_link(link)
+            errors = remove_tree(path)
+        except OSError as e:
+            errors = [(path, e)]
+        finally:
+            with _purging_lock:
+                _purging.discard(path)
+        if errors:
+            failed.extend(errors)
+            print(f"[Disk] Не удалось дочистить {path}: {errors[0][1]} (и ещё {len(errors) - 1})")
+        else:
+            removed += 1
+    return removed, failed
+
+
+# === Что можно убрать ===
+def orphan_versions(game_dir, version_id):
+    #versions/<id> вне цепочки текущей версии (старые fabric/forge после смены загрузчика); [(путь, байт)]
+    keep = {data["id"] for data in stamps.load_version_chain(game_dir, version_id)}
+    versions_dir = os.path.join(game_dir, "versions")
+    found = []
+    for name in os.listdir(versions_dir) if os.path.isdir(versions_dir) else ():
+        path = os.path.join(versions_dir, name)
+        if name not in keep and os.path.isdir(path) and not is_dir_link(path):
+            found.append((path, scan(path)["own"]))
+    return found
+
+
+def stale_leftovers(root, now=None, age=STALE_AGE):
+    #брошенные .part/.lnk от упавших загрузок и установок; [(путь, байт)]
+    #только имена, которые пишет сам лаунчер: чужие .tmp не наши, их не трогаем
+    now = now or time.time()
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not is_dir_link(os.path.join(dirpath, d))]
+        for fn in filenames:
+            if not LEFTOVER_RE.search(fn):
+                continue
+            path = os.path.join(dirpath, fn)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > age:
+                found.append((path, st.st_size))
+    return found
+
+
+def stale_forge_temp(now=None, age=STALE_AGE):
+    #временные папки установщика forge, оставшиеся после убитого процесса; [(путь, байт)]
+    now = now or time.time()
+    tmp = tempfile.gettempdir()
+    found = []
+    try:
+        names = os.listdir(tmp)
+    except OSError:
+        return found
+    for name in names:
+        path = os.path.join(tmp, name)
+        if name.startswith(FORGE_TEMP_PREFIXES) and os.path.isdir(path):
+            try:
+                if now - os.path.getmtime(path) > age:
+                    found.append((path, scan(path)["bytes"]))
+            except OSError:
+                pass
+    return found
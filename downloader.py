@@ -0,0 +1,270 @@
+import os, json, time, hashlib, platform, threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+import tracing
+
+# === Качалка файлов версии ===
+# Параллельно тянет клиент, библиотеки, ассеты и рантайм по version json
+# одним пулом соединений, докачивает .part файлы и сверяет sha1 на лету.
+# После неё установщики minecraft_launcher_lib находят всё на месте и
+# только проверяют хэши.
+
+ASSETS_URL       = "https://resources.download.minecraft.net"
+JVM_MANIFEST_URL = "https://launchermeta.mojang.com/v1/products/java-runtime/2ec0cc96c44e5a76b9c8b7c39df7210883d12871/all.json"
+CHUNK            = 64 * 1024
+
+
+class DownloadError(Exception):
+    pass
+
+
+class DownloadTask:
+    __slots__ = ("url", "path", "sha1", "size", "executable", "share")
+
+    #share=False - файл не кладём в общее хранилище (json-ы версий, файлы рантайма)
+    def __init__(self, url, path, sha1=None, size=None, executable=False, share=True):
+        self.url, self.path, self.sha1, self.size = url, path, sha1, size
+        self.executable, self.share = executable, share
+
+
+# === Платформа ===
+def os_name():
+    return {"Windows": "windows", "Darwin": "osx"}.get(platform.system(), "linux")
+
+def jvm_platform():
+    #строка платформы рантаймов mojang - ровно как у minecraft_launcher_lib
+    #(install_jvm_runtime кладёт рантайм в папку с этим именем): разрядность
+    #смотрим по самому python, отдельных arm-сборок для windows и linux нет
+    system = platform.system()
+    if system == "Darwin":
+        return "mac-os-arm64" if platform.machine() == "arm64" else "mac-os"
+    bits32 = platform.architecture()[0] == "32bit"
+    if system == "Windows":
+        return "windows-x86" if bits32 else "windows-x64"
+    if system == "Linux":
+        return "linux-i386" if bits32 else "linux"
+    return "gamecore"
+
+def rules_allow(rules):
+    #упрощённый разбор rules из version json: смотрим только на os
+    if not rules:
+        return True
+    allowed = False
+    for rule in rules:
+        if "features" in rule:
+            continue
+        cond = rule.get("os", {})
+        if "name" in cond and cond["name"] != os_name():
+            continue
+        if "arch" in cond and cond["arch"] == "x86" and platform.architecture()[0] != "32bit":
+            continue
+        allowed = rule["action"] == "allow"
+    return allowed
+
+
+class Downloader:
+    def __init__(self, workers=16, retries=4, store=None, session=None):
+        self.workers = workers
+        self.retries = retries
+        self.store = store
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = "EchoLauncher"
+        self.session = session
+
+    # === Один файл ===
+    def _is_valid(self, task):
+        if not os.path.isfile(task.path):
+            return False
+        if task.size is not None and os.path.getsize(task.path) != task.size:
+            return False
+        if task.sha1 is None:
+            return True
+        h = hashlib.sha1()
+        with open(task.path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest() == task.sha1
+
+    def _fetch(self, task):
+        part = task.path + ".part"
+        h = hashlib.sha1()
+        offset = 0
+        #докачка: хэшируем то, что уже есть, и просим остаток через Range
+        if os.path.isfile(part):
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+                    offset += len(chunk)
+        resumed = offset
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(task.url, headers=headers, stream=True, timeout=30) as r:
+            if r.status_code == 416:
+                # уже докачано целиком
+                pass
+            elif r.status_code == 206 and offset:
+                with open(part, "ab") as f:
+                    for chunk in r.iter_content(CHUNK):
+                        h.update(chunk)
+                        f.write(chunk)
+                        offset += len(chunk)
+            else:
+                r.raise_for_status()
+                h = hashlib.sha1()
+                offset = resumed = 0
+                with open(part, "wb") as f:
+                    for chunk in r.iter_content(CHUNK):
+                        h.update(chunk)
+                        f.write(chunk)
+                        offset += len(chunk)
+        if task.sha1 is not None and h.hexdigest() != task.sha1:
+            os.remove(part)
+            raise DownloadError(f"Хэш не совпал: {task.url}")
+        os.replace(part, task.path)
+        tracing.count("download_bytes", offset - resumed)
+        tracing.count("download_files")
+        if task.executable:
+            os.chmod(task.path, 0o755)
+
+    def download(self, task):
+        if self._is_valid(task):
+            return False
+        os.makedirs(os.path.dirname(task.path), exist_ok=True)
+        if task.share and task.sha1 and self.store is not None and self.store.link_into(task.sha1, task.path):
+            return False
+        for attempt in range(self.retries + 1):
+            try:
+                self._fetch(task)
+                break
+            except (requests.RequestException, DownloadError, OSError) as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"Не удалось скачать {task.url}: {e}")
+                time.sleep(0.5 * 2 ** attempt)
+        if task.share and task.sha1 and self.store is not None:
+            self.store.put(task.path, task.sha1)
+        return True
+
+    # === Пачка файлов ===
+    @tracing.traced("download_all")
+    def download_all(self, tasks, callback=None):
+        #callback - тот же dict, что у установщиков minecraft_launcher_lib
+        callback = callback or {}
+        # один и тот же путь может встретиться дважды (нативы, общие ассеты)
+        tasks = list({t.path: t for t in tasks}.values())
+        callback.get("setMax", lambda _: None)(len(tasks))
+        done = [0]
+        lock = threading.Lock()
+        errors = []
+        abort = []      # исключение из callback (например, отмена задачи) - останавливаем всё
+
+        def run(task):
+            if abort:
+                return
+            try:
+                self.download(task)
+                with lock:
+                    done[0] += 1
+                    callback.get("setProgress", lambda _: None)(done[0])
+            except DownloadError as e:
+                errors.append(e)
+            except Exception as e:
+                abort.append(e)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(run, tasks))
+        if abort:
+            raise abort[0]
+        if errors:
+            raise DownloadError(f"Не скачано файлов: {len(errors)}. Первая ошибка: {errors[0]}")
+
+    def get_json(self, url, path, sha1=None):
+        self.download(DownloadTask(url, path, sha1, share=False))
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # === Планирование по version json ===
+    @tracing.traced("plan_version")
+    def plan_version(self, version_id, game_dir, manifest, callback=None, runtime=True):
+        #manifest - version_manifest_v2.json (из ManifestCache); None - только локальные json
+        #runtime=False - без рантайма (его манифест есть только в сети)
+        callback = callback or {}
+        callback.get("setStatus", lambda _: None)(f"Подготовка {version_id}")
+        json_path = os.path.join(game_dir, "versions", version_id, version_id + ".json")
+        entry = next((v for v in (manifest or {}).get("versions", []) if v["id"] == version_id), None)
+        if entry:
+            data = self.get_json(entry["url"], json_path, entry.get("sha1"))
+        elif os.path.isfile(json_path):
+            with open(json_path, encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            raise DownloadError(f"Версия {version_id} не найдена в манифесте")
+
+        tasks = []
+        if "inheritsFrom" in data:
+            tasks += self.plan_version(data["inheritsFrom"], game_dir, manifest, callback, runtime)
+
+        libs_dir = os.path.join(game_dir, "libraries")
+        for lib in data.get("libraries", []):
+            if not rules_allow(lib.get("rules")):
+                continue
+            downloads = lib.get("downloads", {})
+            art = downloads.get("artifact")
+            if art and art.get("url") and art.get("path"):
+                tasks.append(DownloadTask(art["url"], os.path.join(libs_dir, art["path"]), art.get("sha1"), art.get("size")))
+            classifier = lib.get("natives", {}).get(os_name())
+            if classifier:
+                classifier = classifier.replace("${arch}", "64" if platform.architecture()[0] == "64bit" else "32")
+                native = downloads.get("classifiers", {}).get(classifier)
+                if native:
+                    tasks.append(DownloadTask(native["url"], os.path.join(libs_dir, native["path"]), native.get("sha1"), native.get("size")))
+
+        client = data.get("downloads", {}).get("client")
+        if client:
+            tasks.append(DownloadTask(client["url"], os.path.join(game_dir, "versions", data["id"], data["id"] + ".jar"), client["sha1"], client.get("size")))
+
+        log_file = data.get("logging", {}).get("client", {}).get("file")
+        if log_file:
+            tasks.append(DownloadTask(log_file["url"], os.path.join(game_dir, "assets", "log_configs", log_file["id"]), log_file["sha1"], log_file.get("size")))
+
+        if "assetIndex" in data:
+            index = data["assetIndex"]
+            index_data = self.get_json(index["url"], os.path.join(game_dir, "assets", "indexes", data["assets"] + ".json"), index["sha1"])
+            for obj in index_data.get("objects", {}).values():
+                h = obj["hash"]
+                tasks.append(DownloadTask(f"{ASSETS_URL}/{h[:2]}/{h}", os.path.join(game_dir, "assets", "objects", h[:2], h), h, obj.get("size")))
+
+        if runtime and "javaVersion" in data:
+            tasks += self.plan_runtime(data["javaVersion"]["component"], game_dir)
+        return tasks
+
+    def plan_runtime(self, component, game_dir):
+        try:
+            all_runtimes = self.session.get(JVM_MANIFEST_URL, timeout=15).json()
+            variants = all_runtimes.get(jvm_platform(), {}).get(component, [])
+            if not variants:
+                return []
+            files = self.session.get(variants[0]["manifest"]["url"], timeout=15).json()["files"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            # рантайм потом всё равно поставит установщик
+            print(f"[Download] Манифест рантайма {component} недоступен:", e)
+            return []
+        base = os.path.join(game_dir, "runtime", component, jvm_platform(), component)
+        tasks = []
+        for rel, info in files.items():
+            if info["type"] != "file":
+                continue
+            raw = info["downloads"]["raw"]
+            # рантайм и так один на все сборки (общая папка), в хранилище его не дублируем:
+            # ни один набор версии на эти объекты не ссылается, и сборка мусора стирала бы их каждый раз
+            tasks.append(DownloadTask(raw["url"], os.path.join(base, *rel.split("/")), raw["sha1"], raw.get("size"),
+                                      info.get("executable", False), share=False))
+        return tasks
+
+    def prefetch_version(self, version_id, game_dir, manifest, callback=None):
+        tasks = self.plan_version(version_id, game_dir, manifest, callback)
+        (callback or {}).get("setStatus", lambda _: None)(f"Загрузка {version_id}")
+        self.download_all(tasks, callback)
@@ -0,0 +1,103 @@
+import json, os, re, hashlib, threading
+import xml.etree.ElementTree as ET
+
+# === Индекс версий Forge ===
+# Собираем из maven-metadata.xml (все версии) и promotions_slim.json
+# (recommended/latest) один индекс mc_version -> версии Forge и храним его
+# в forge_index.json. Окно и установщик читают только его, сеть трогает
+# refresh(): сырые ответы идут через ManifestCache (TTL + ETag/Last-Modified),
+# а индекс пересобирается, только если они поменялись.
+
+FORGE_PROMOS_URL = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
+FORGE_MAVEN_URL  = "https://maven.minecraftforge.net/net/minecraftforge/forge/maven-metadata.xml"
+
+
+def _version_key(text):
+    #"1.20.1" / "47.2.0" -> (1, 20, 1) для сортировки по смыслу, а не по строке
+    return tuple(int(n) for n in re.findall(r"\d+", text))
+
+
+def build_index(promos, maven_xml):
+    #{mc: {"versions": [полные версии, новые первыми], "recommended": ..., "latest": ...}}
+    index = {}
+    for el in ET.fromstring(maven_xml).iter("version"):
+        full = (el.text or "").strip()
+        mc, sep, forge = full.partition("-")
+        if sep:
+            index.setdefault(mc, {"versions": [], "recommended": None, "latest": None})["versions"].append(full)
+    for mc, entry in index.items():
+        entry["versions"].sort(key=lambda v: _version_key(v.partition("-")[2]), reverse=True)
+    for key, forge in (promos or {}).get("promos", {}).items():
+        mc, _, kind = key.rpartition("-")
+        entry = index.get(mc)
+        if not entry or kind not in ("recommended", "latest"):
+            continue
+        #старые версии в maven с хвостом: 1.7.10-10.13.4.1614-1.7.10
+        for full in (f"{mc}-{forge}", f"{mc}-{forge}-{mc}"):
+            if full in entry["versions"]:
+                entry[kind] = full
+                break
+    return index
+
+
+class ForgeIndex:
+    def __init__(self, index_file, manifest_cache):
+        self.index_file = index_file
+        self.manifest_cache = manifest_cache      # отдельный кэш: maven-metadata большой, в общем кэше он ни к чему
+        self._lock = threading.Lock()
+        self._index = {}
+        self._source = None
+        try:
+            with open(index_file, encoding="utf-8") as f:
+                data = json.load(f)
+            self._index, self._source = data["index"], data.get("source")
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self._source, "index": self._index}, f, ensure_ascii=False)
+        os.replace(tmp, self.index_file)
+
+    def refresh(self, force=False):
+        #True, если индекс поменялся
+        promos = self.manifest_cache.fetch(FORGE_PROMOS_URL, force=force)
+        maven_xml = self.manifest_cache.fetch(FORGE_MAVEN_URL, parse="text", force=force)
+        source = hashlib.sha1(maven_xml.encode() + json.dumps(promos, sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            if source == self._source:
+                return False
+            self._index = build_index(promos, maven_xml)
+            self._source = source
+            self._save()
+        print(f"[Forge] Индекс обновлён: {len(self._index)} версий Minecraft")
+        return True
+
+    # === Чтение, без сети ===
+    def is_empty(self):
+        return not self._index
+
+    def mc_versions(self):
+        #версии Minecraft, для которых есть Forge, новые первыми
+        return sorted(self._index, key=_version_key, reverse=True)
+
+    def versions(self, mc_version):
+        return list(self._index.get(mc_version, {}).get("versions", []))
+
+    def recommended(self, mc_version):
+        return self._index.get(mc_version, {}).get("recommended")
+
+    def latest(self, mc_version):
+        return self._index.get(mc_version, {}).get("latest")
+
+    def newest(self, mc_version):
+        #самая новая версия - так выбирал find_forge_version до индекса
+        return (self.versions(mc_version) or [None])[0]
+
+    def pick(self, mc_version):
+        #что ставить по умолчанию: recommended, потом latest, потом самая новая
+        entry = self._index.get(mc_version)
+        if not entry:
+            return None
+        return entry["recommended"] or entry["latest"] or (entry["versions"] or [None])[0]
@@ -0,0 +1,143 @@
+import os, sys, subprocess
+
+# === Профили JVM ===
+# В java_config.json общие настройки (max_memory/min_memory/args/gc/mode)
+# служат профилем по умолчанию, а в "profiles" лежат переопределения для
+# отдельных сборок. В режиме "auto" -Xmx/-Xms считаются из общей памяти
+# машины, числа уже запущенных клиентов и типа сборки (fabric/forge обычно
+# с модами и им нужно больше). GC выбирается из пресетов ниже; если
+# рантайм сборки пресет не тянет (ZGC на 8-й жаве), откатываемся на G1.
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+#сколько хотим дать сборке, если памяти хватает
+AUTO_TARGET = {"vanilla": 3 * GB, "fabric": 4 * GB, "forge": 6 * GB}
+AUTO_MIN    = 1 * GB           # меньше этого майнкрафт уже не живёт
+AUTO_STEP   = 256 * MB         # округляем, чтобы в аргументах были ровные числа
+
+#пресет -> (минимальная мажорная версия жавы, флаги)
+GC_PRESETS = {
+    "default": (8, []),
+    "g1": (8, ["-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+               "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC",
+               "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+               "-XX:G1ReservePercent=20", "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4",
+               "-XX:InitiatingHeapOccupancyPercent=15", "-XX:G1MixedGCLiveThresholdPercent=90",
+               "-XX:G1RSetUpdatingPauseTimePercent=5", "-XX:SurvivorRatio=32",
+               "-XX:+PerfDisableSharedMem", "-XX:MaxTenuringThreshold=1"]),
+    "g1-lowpause": (8, ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=50", "-XX:G1HeapRegionSize=4M",
+                        "-XX:+ParallelRefProcEnabled", "-XX:+DisableExplicitGC"]),
+    "zgc": (17, ["-XX:+UseZGC"]),
+    "zgc-generational": (21, ["-XX:+UseZGC", "-XX:+ZGenerational"]),
+}
+GC_FALLBACK = "g1"
+
+PROFILE_KEYS = ("mode", "max_memory", "min_memory", "gc", "args")
+DEFAULT_PROFILE = {"mode": "manual", "max_memory": "4G", "min_memory": "2G", "gc": "default", "args": ""}
+
+
+def total_memory():
+    #физическая память машины в байтах или None
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except ImportError:
+        pass
+    if os.name == "nt":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys
+        return None
+    if sys.platform == "darwin":
+        try:
+            return int(subprocess.run(["sysctl", "-n", "hw.memsize"], capture_output=True, text=True, timeout=5).stdout)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            return None
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def parse_size(text):
+    #"4G" / "512M" / "2048m" -> байты, None если не разобрать
+    text = str(text).strip().upper()
+    units = {"K": 1024, "M": MB, "G": GB}
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        return None
+
+
+def format_size(size):
+    #в мегабайтах, если не делится на гигабайт: JVM понимает только целые
+    return f"{size // GB}G" if size % GB == 0 else f"{size // MB}M"
+
+
+def profile_for(cfg, build_name=None):
+    #общие настройки + переопределения сборки
+    profile = dict(DEFAULT_PROFILE)
+    profile.update({k: cfg[k] for k in PROFILE_KEYS if k in cfg})
+    if build_name:
+        profile.update(cfg.get("profiles", {}).get(build_name, {}))
+    return profile
+
+
+def save_profile(cfg, build_name, profile):
+    #в профиль сборки пишем только то, что отличается от общих настроек
+    base = profile_for(cfg)
+    own = {k: profile[k] for k in PROFILE_KEYS if k in profile and profile[k] != base.get(k)}
+    profiles = cfg.setdefault("profiles", {})
+    if own:
+        profiles[build_name] = own
+    else:
+        profiles.pop(build_name, None)
+
+
+def auto_heap(build_type, running=0, total=None):
+    #(Xmx, Xms) в байтах: ОС оставляем четверть, но не меньше 2 ГБ, остальное делим на клиентов
+    total = total or total_memory() or 8 * GB
+    budget = (total - max(2 * GB, total // 4)) // (running + 1)
+    xmx = min(AUTO_TARGET.get(build_type, AUTO_TARGET["vanilla"]), budget)
+    xmx = max(AUTO_MIN, xmx // AUTO_STEP * AUTO_STEP)
+    # -Xms пополам: параллельные клиенты не забирают всю кучу сразу
+    xms = max(AUTO_STEP, xmx // 2 // AUTO_STEP * AUTO_STEP)
+    return xmx, xms
+
+
+def gc_flags(preset, java_major=None):
+    if preset not in GC_PRESETS:
+        print(f"[JVM] Неизвестный пресет GC {preset}, используем {GC_FALLBACK}")
+        preset = GC_FALLBACK
+    need, flags = GC_PRESETS[preset]
+    if java_major is not None and java_major < need:
+        print(f"[JVM] {preset} требует Java {need}+, а у сборки {java_major}; используем {GC_FALLBACK}")
+        flags = GC_PRESETS[GC_FALLBACK][1]
+    return list(flags)
+
+
+def resolve(profile, build_type, java_major=None, running=0, total=None):
+    #аргументы JVM для запуска: -Xmx, -Xms, флаги GC и свои аргументы пользователя
+    if profile.get("mode") == "auto":
+        xmx, xms = auto_heap(build_type, running, total)
+        max_ram, min_ram = format_size(xmx), format_size(xms)
+    else:
+        max_ram = profile.get("max_memory") or DEFAULT_PROFILE["max_memory"]
+        min_ram = profile.get("min_memory") or DEFAULT_PROFILE["min_memory"]
+        #Xms больше Xmx JVM не запустит
+        if (parse_size(min_ram) or 0) > (parse_size(max_ram) or 0) > 0:
+            min_ram = max_ram
+    return [f"-Xmx{max_ram}", f"-Xms{min_ram}"] + gc_flags(profile.get("gc", "default"), java_major) \
+        + profile.get("args", "").split()
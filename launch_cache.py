@@ -0,0 +1,123 @@
+import os, json, hashlib, threading
+import minecraft_launcher_lib
+from stamps import meta_dir
+import tracing
+
+# === Кэш команды запуска ===
+# get_minecraft_command каждый раз разбирает цепочку version json и собирает
+# classpath из сотен библиотек. Собираем команду один раз с метками вместо
+# ника/uuid/токена/жавы/аргументов JVM, храним её в памяти и в
+# <сборка>/.echolauncher/command.json, а при запуске только подставляем значения.
+# Кэш сбрасывается, если поменялся любой json из цепочки версии.
+
+CACHE_NAME   = "command.json"
+SESSION_KEYS = {"username": "@@ECHO_USERNAME@@", "uuid": "@@ECHO_UUID@@", "token": "@@ECHO_TOKEN@@"}
+JAVA_MARK    = "@@ECHO_JAVA@@"
+JVM_MARK     = "@@ECHO_JVM_ARGS@@"
+# эти поля подставляем при запуске, остальные опции входят в ключ кэша
+LAUNCH_FIELDS = ("username", "uuid", "token", "executablePath", "jvmArguments")
+
+
+def _chain_files(build_path, version_id):
+    files = []
+    while version_id:
+        path = os.path.join(build_path, "versions", version_id, version_id + ".json")
+        files.append(path)
+        with open(path, encoding="utf-8") as f:
+            version_id = json.load(f).get("inheritsFrom")
+    return files
+
+def _fingerprint(files):
+    #None, если какой-то json пропал
+    result = []
+    for path in files:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        result.append([path, st.st_size, st.st_mtime_ns])
+    return result
+
+def _options_key(version_id, options):
+    static = {k: v for k, v in options.items() if k not in LAUNCH_FIELDS}
+    raw = json.dumps([version_id, static], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CommandCache:
+    def __init__(self):
+        self._mem = {}       # (version_id, build_path) -> запись кэша
+        self._lock = threading.Lock()
+
+    def _cache_file(self, build_path):
+        return os.path.join(meta_dir(build_path), CACHE_NAME)
+
+    def _load(self, build_path):
+        try:
+            with open(self._cache_file(build_path), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, build_path, entry):
+        os.makedirs(meta_dir(build_path), exist_ok=True)
+        tmp = self._cache_file(build_path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._cache_file(build_path))
+
+    def _is_valid(self, entry, key):
+        return (entry is not None and entry.get("key") == key
+                and _fingerprint([p for p, _, _ in entry["fingerprint"]]) == entry["fingerprint"])
+
+    def _build_template(self, version_id, build_path, options, key):
+        template_opts = dict(options)
+        template_opts.update(SESSION_KEYS)
+        template_opts["executablePath"] = JAVA_MARK
+        template_opts["jvmArguments"] = [JVM_MARK]
+        with tracing.span("get_minecraft_command", version=version_id):
+            template = minecraft_launcher_lib.command.get_minecraft_command(version_id, build_path, template_opts)
+        return {"key": key,
+                "fingerprint": _fingerprint(_chain_files(build_path, version_id)),
+                "template": template}
+
+    def get_template(self, version_id, build_path, options):
+        key = _options_key(version_id, options)
+        mem_key = (version_id, build_path)
+        with self._lock:
+            entry = self._mem.get(mem_key)
+        if not self._is_valid(entry, key):
+            entry = self._load(build_path)
+            if not self._is_valid(entry, key):
+                entry = self._build_template(version_id, build_path, options, key)
+                self._save(build_path, entry)
+            with self._lock:
+                self._mem[mem_key] = entry
+        return entry["template"]
+
+    @tracing.traced("command build")
+    def get_command(self, version_id, build_path, options):
+        #то же, что get_minecraft_command, но из кэша
+        template = self.get_template(version_id, build_path, options)
+        values = {mark: options[name] for name, mark in SESSION_KEYS.items()}
+        cmd = []
+        for arg in template:
+            if arg == JVM_MARK:
+                cmd.extend(options.get("jvmArguments", []))
+            elif arg == JAVA_MARK:
+                cmd.append(options["executablePath"])
+            else:
+                if "@@ECHO_" in arg:
+                    for mark, value in values.items():
+                        arg = arg.replace(mark, value)
+                cmd.append(arg)
+        return cmd
+
+    def invalidate(self, build_path):
+        with self._lock:
+            for k in [k for k in self._mem if k[1] == build_path]:
+                del self._mem[k]
+        try:
+            os.remove(self._cache_file(build_path))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,42 @@
+import os
+from contextlib import contextmanager
+
+# === Блокировка файла между процессами ===
+# Окно и cli.py могут работать одновременно, а общие json (список сборок,
+# индекс хранилища, кэши) переписываются целиком. Кто пишет - берёт
+# блокировку на <файл>.lock, перечитывает файл и только потом сохраняет.
+# Между потоками одного процесса блокировка не действует - там нужен свой Lock.
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def file_lock(lock_path):
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def file_stamp(path):
+    #(mtime, размер, inode) или None; os.replace даёт новый inode, так что
+    #изменение видно даже при том же mtime
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
@@ -1,286 +1,75 @@
+import tracing
+tracing.enable_from_argv()      # --trace[=файл] - до остальных импортов, чтобы попали и они
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import minecraft_launcher_lib
-from minecraft_launcher_lib import utils, install
-from minecraft_launcher_lib.fabric import install_fabric, get_all_minecraft_versions as get_fabric_versions
-import requests, json, uuid, os, subprocess, webbrowser
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import os, webbrowser
 from PIL import Image, ImageTk
-import sys
-from io import BytesIO
-
-
-
-# === Константы ===
-AUTH_URL               = "https://authserver.ely.by/auth/authenticate"            # url с аутентификацией
-REFRESH_URL            = "https://authserver.ely.by/auth/refresh"                 # хз, важная херня
-AUTHLIB_INJECTOR_PATH  = "authlib/authlib-injector-1.2.5.jar"                     # путь к AuthLib для ely.by
-
-if getattr(sys, 'frozen', False):
-    LAUNCHER_DIR = os.path.dirname(sys.executable)
-else:
-    LAUNCHER_DIR = os.path.abspath(os.path.dirname(__file__))
-
-GAME_ROOT_DIR          = os.path.join(LAUNCHER_DIR, "instances")                  # общая папка игры
-BUILDS_DIR             = os.path.join(GAME_ROOT_DIR, "builds")                    # сюда кладём сборки
-SESSION_DIR            = os.path.join(LAUNCHER_DIR, "session")                    # папка сессии
-SESSION_FILE           = os.path.join(SESSION_DIR, "session.json")                # файл сессии
-BUILDS_FILE            = os.path.join(GAME_ROOT_DIR, "builds.json")               # файл сборок
-JAVA_CONFIG_FILE       = os.path.join(LAUNCHER_DIR, "java_config.json")           # конфиг жавы, там сохраняются указанные параметры
-#получаем путь к жаве
-def get_java_path(build_path):
-    runtime_base = os.path.join(build_path, "runtime")
-    candidates = ["java-runtime-gamma", "java-runtime-delta"]
-
-    for candidate in candidates:
-        java_path = os.path.join(
-            runtime_base,
-            candidate,
-            "windows-x64",
-            candidate,
-            "bin",
-            "java.exe"
-        )
-        if os.path.isfile(java_path):
-            return java_path
-
-    # Если ни одна из версий не найдена
-    raise FileNotFoundError("Java runtime не найден ни в gamma, ни в delta")
-
-
-#создаём папки, если надо
-os.makedirs(GAME_ROOT_DIR, exist_ok=True)
-os.makedirs(BUILDS_DIR, exist_ok=True)
-os.makedirs(SESSION_DIR, exist_ok=True)
+import core
+import tasks
+import jvm_profiles
+import diskusage
+
+# вся логика лежит в core.py, здесь только окно
+
+
+core.ensure_dirs()
+java_config = core.java_config
 
 # === Доступные версии Minecraft ===
-#ванилла
-vanilla_versions   = utils.get_available_versions(GAME_ROOT_DIR)
-vanilla_version_ids = [v["id"] for v in vanilla_versions if v["type"] in ["release", "snapshot"]]
-#фарбик
-fabric_versions_raw = get_fabric_versions()
-fabric_version_ids  = [v["version"] for v in fabric_versions_raw]
-
-# === Java конфиг ===
-#загрузка конфига жавы
-def load_java_config():
-    if not os.path.isfile(JAVA_CONFIG_FILE):
-        return {"memory": "2G", "args": ""}
-    with open(JAVA_CONFIG_FILE, encoding="utf-8") as f:
-        return json.load(f)
-#сохранение конфига
-def save_java_config(cfg):
-    with open(JAVA_CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
-
-java_config = load_java_config()
-
-# Forge promos подгружаем на лету, когда нужно
-forge_promos_cache = {}  # mc_version -> forge_version
-
-def fetch_forge_promos():
-    global forge_promos_cache
-    if forge_promos_cache:
-        return
-    try:
-        data = requests.get("https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json").json()
-        promos = data.get("promos", {})
-        for key, val in promos.items():
-            if key.endswith("-latest"):
-                mc = key[:-7]
-                forge_promos_cache[mc] = val
-    except Exception as e:
-        print("[Forge] Не удалось получить promos:", e)
-
-# === Сессия ===
-#сохранение сессии
-def save_session(d):
-    with open(SESSION_FILE, "w", encoding="utf-8") as f:
-        json.dump(d, f, ensure_ascii=False, indent=2)
-#загрузка сесии
-def load_session():
-    if not os.path.isfile(SESSION_FILE):
-        return None
-    with open(SESSION_FILE, encoding="utf-8") as f:
-        return json.load(f)
-
-# === Сборки ===
-#загрузка существующих сборок
-def load_builds():
-    if not os.path.isfile(BUILDS_FILE):
-        return []
-    with open(BUILDS_FILE, encoding="utf-8") as f:
-        return json.load(f)
-#сохранение сборки
-def save_builds(builds):
-    with open(BUILDS_FILE, "w", encoding="utf-8") as f:
-        json.dump(builds, f, ensure_ascii=False, indent=2)
-#создание сборки
-def add_build(name, mc_version, mc_type):
-    builds = load_builds()
-    if any(b["name"] == name for b in builds):
-        raise ValueError("Сборка с таким именем уже существует")
-    build = {"name": name, "version": mc_version, "type": mc_type}
-    builds.append(build)
-    save_builds(builds)
-    # создаём папку
-    os.makedirs(os.path.join(BUILDS_DIR, name), exist_ok=True)
+# сначала берём то, что лежит в кэше, а свежие списки подтягиваем в фоне
+core.load_cached_version_lists()
+core.start_version_refresh()
+core.validate_session_in_background()
 
-# === Авторизация ===
+# все долгие операции уходят сюда, GUI только опрашивает результаты
+task_runner = tasks.TaskRunner(workers=java_config.get("task_workers", 4))
 
+# === Авторизация ===
 def login():
     user, pwd = username_entry.get(), password_entry.get()
     if not user or not pwd:
         return messagebox.showwarning("Ошибка", "Введите логин и пароль")
-    payload = {"username": user, "password": pwd, "clientToken": str(uuid.uuid4()), "requestUser": True}
-    try:
-        r = requests.post(AUTH_URL, json=payload)
-        if r.status_code == 200:
-            d = r.json()
-            sess = {"accessToken": d["accessToken"], "clientToken": d["clientToken"],
-                    "uuid": d["selectedProfile"]["id"], "username": d["selectedProfile"]["name"]}
-            save_session(sess)
-            messagebox.showinfo("Готово", f"Добро пожаловать, {sess['username']}!")
-        else:
-            messagebox.showerror("Ошибка", r.json().get("errorMessage", "Неизвестная ошибка"))
-    except Exception as e:
-        messagebox.showerror("Ошибка", str(e))
+    task_runner.submit("Вход", lambda task: core.authenticate(user, pwd),
+                       on_done=lambda sess: messagebox.showinfo("Готово", f"Добро пожаловать, {sess['username']}!"),
+                       on_error=lambda e: messagebox.showerror("Ошибка", str(e)))
 
 def refresh_session():
-    sess = load_session()
-    if not sess:
+    if not core.load_session():
         return messagebox.showwarning("Нет токена", "Сначала войдите через логин и пароль.")
-    payload = {"accessToken": sess["accessToken"], "clientToken": sess["clientToken"], "requestUser": True}
-    try:
-        r = requests.post(REFRESH_URL, json=payload)
-        if r.status_code == 200:
-            d = r.json()
-            sess.update({"accessToken": d["accessToken"],
-                          "uuid": d["selectedProfile"]["id"],
-                          "username": d["selectedProfile"]["name"]})
-            save_session(sess)
-            messagebox.showinfo("Сессия", f"Добро пожаловать обратно, {sess['username']}!")
-        else:
-            messagebox.showerror("Ошибка", r.json().get("errorMessage", "Неизвестная ошибка"))
-    except Exception as e:
-        messagebox.showerror("Ошибка", str(e))
-
-# === Установка версий (vanilla / fabric / forge) ===
-#убеждаемся в том, что сборка установлена
-def ensure_installed(build):
-    mc_version = build["version"]
-    mc_type = build["type"]
-    game_dir = os.path.join(BUILDS_DIR, build["name"])
-    version_id = None
-
-    versions_dir = os.path.join(game_dir, "versions")
-    if not os.path.exists(versions_dir):
-        os.makedirs(versions_dir)
-
-    #когда версия уже установлена
-    def version_installed(ver_id):
-        return os.path.exists(os.path.join(versions_dir, ver_id))
-
-    #если ванилла
-    if mc_type == "vanilla":
-        version_id = mc_version
-        if not version_installed(version_id):
-            install.install_minecraft_version(mc_version, game_dir)
-
-    #если фабрик
-    elif mc_type == "fabric":
-        install.install_minecraft_version(mc_version, game_dir)
-        install_fabric(mc_version, game_dir)
-        version_id = None
-        for d in os.listdir(versions_dir):
-            if d.endswith(f"-{mc_version}") and "fabric-loader" in d:
-                version_id = d
-                break
-        if not version_id:
-            raise Exception("Не удалось найти установленную Fabric версию")
-
-    #если форж
-    elif mc_type == "forge":
-        # Получаем forge версию по mc_version
-        forge_version = minecraft_launcher_lib.forge.find_forge_version(mc_version)
-        if forge_version is None:
-            raise Exception(f"Forge не поддерживает версию {mc_version}")
-
-        if not minecraft_launcher_lib.forge.supports_automatic_install(forge_version):
-            raise Exception(f"Автоматическая установка Forge {forge_version} не поддерживается")
-
-        minecraft_launcher_lib.forge.install_forge_version(forge_version, game_dir)
-
-        # Найдём установленную версию (поиск по versions/*)
-        all_installed = utils.get_installed_versions(game_dir)
-        for v in all_installed:
-            if mc_version in v["id"] and "forge" in v["id"]:
-                version_id = v["id"]
-                break
-        else:
-            raise Exception("Forge установлен, но не удалось найти его ID")
-    #возвращаем важную херобору, тронете - убью
-    return version_id
+    task_runner.submit("Обновление сессии", lambda task: core.refresh_session(),
+                       on_done=lambda sess: messagebox.showinfo("Сессия", f"Добро пожаловать обратно, {sess['username']}!"),
+                       on_error=lambda e: messagebox.showerror("Ошибка", str(e)))
 
 
 # === Запуск ===
-def launch_selected_build():
-    #Загружаем сессию(авторизацию)
-    sess = load_session()
-    if not sess:
+busy_builds = set()     # сборки, которые сейчас ставятся/запускаются
+
+def launch_selected_build(repair=False):
+    #Загружаем сессию(авторизацию), токен проверится уже в фоне перед запуском
+    if not core.load_session():
         return messagebox.showerror("Ошибка", "Сначала войдите")
 
     #Получаем выбранную сборку
     build_name = builds_combobox.get()
     if not build_name:
         return messagebox.showwarning("Сборка", "Не выбрана сборка")
+    if build_name in busy_builds:
+        return messagebox.showwarning("Сборка", f"Сборка {build_name} уже устанавливается")
 
     #Находим метаданные сборки
-    build = next((b for b in load_builds() if b["name"] == build_name), None)
+    build = core.find_build(build_name)
     if not build:
         return messagebox.showerror("Сборка", "Метаданные не найдены")
 
-    #Убеждаемся в установке версии, если нету - качаем
-    try:
-        version_id = ensure_installed(build)
-        if not version_id:
-            return messagebox.showerror("Ошибка", "Не удалось установить версию Minecraft для сборки")
-    except Exception as e:
-        return messagebox.showerror("Установка", str(e))
-
-    #Путь к сборке
-    build_path = os.path.join(BUILDS_DIR, build_name)
-    #Получаем путь к жаве через функцию в начале
-    java_path =  get_java_path(build_path)
-
-    max_ram = max_ram_entry.get().strip()
-    min_ram = min_ram_entry.get().strip()
-
-    #Параметры запуска
-    options = {
-        "username": sess["username"],                                        #ник
-        "uuid": sess["uuid"],                                                #uuid
-        "token": sess["accessToken"],                                        #токен
-        "jvmArguments": [                                                    #аргументы жавы
-        f"-Xmx{max_ram}",
-        f"-Xms{min_ram}",
-            f"-javaagent:{AUTHLIB_INJECTOR_PATH}=https://authserver.ely.by"  #говорим жаве заходить через ely.by
-        ] + jvm_extra_entry.get().split(),
-        "launcherName": "EchoLauncher",                                      #говорим название нашего лаунчера
-        "launcherVersion": "1.1",                                            #версию
-        "gameDirectory": build_path,               #директорию игры(сборки)
-        "executablePath": java_path,                                         #путь к жаве
-    }
-    #Если нету жавы, жалуемся
-    if not os.path.isfile(java_path):
-        return messagebox.showerror("Java", f"Не найден файл Java: {java_path}")
-
-    cmd = minecraft_launcher_lib.command.get_minecraft_command(
-        version_id,
-        build_path,
-        options
-    )
-    subprocess.Popen(cmd)
-    messagebox.showinfo("Запуск", f"Сборка {build_name} успешно запущена!")
+    #поля GUI читаем здесь, в фоне трогать виджеты нельзя
+    jvm_settings = read_java_fields()
+
+    busy_builds.add(build_name)
+    task_runner.submit(f"Сборка {build_name}",
+                       lambda task: core.launch_build(build, jvm_settings, repair=repair, callback=task.callback),
+                       on_done=lambda inst: messagebox.showinfo("Запуск", f"Сборка {build_name} успешно запущена! (pid {inst.pid})"),
+                       on_error=lambda e: messagebox.showerror("Установка", str(e)),
+                       on_finish=lambda: busy_builds.discard(build_name))
 
 # === GUI =================================================================================================================================================================================
 # === GUI =================================================================================================================================================================================
@@ -303,7 +92,8 @@ root.resizable(False, False)
 
 # фон (опционально)
 if os.path.isfile("photos/backgroundphoto.jpg"):
-    bg_img = ImageTk.PhotoImage(Image.open("photos/backgroundphoto.jpg"))
+    with tracing.span("background image decode"):
+        bg_img = ImageTk.PhotoImage(Image.open("photos/backgroundphoto.jpg"))
     tk.Label(root, image=bg_img).place(relwidth=1, relheight=1)
 
 # Авторизация -------------------------------------------------------------
@@ -324,39 +114,215 @@ tk.Button(auth_f, text="Уже входил", command=refresh_session).pack()
 java_f = tk.Frame(root, bd=2, relief="solid", padx=10, pady=10)
 java_f.place(x=650, y=10, width=260, height=300)
 
-for lbl in ["Настройки Java", "Максимум ОЗУ (например 4G):"]:
-    tk.Label(java_f, text=lbl, font=("Arial", 12)).pack(anchor="w")
+java_f.grid_columnconfigure(1, weight=1)
 
-max_ram_entry = tk.Entry(java_f, width=20)
-max_ram_entry.insert(0, java_config.get("max_memory", "4G"))
-max_ram_entry.pack(anchor="w")
+# профиль показываем для выбранной сборки: общие настройки + её переопределения
+MODES = {"manual": "Вручную", "auto": "Авто"}
+tk.Label(java_f, text="Настройки Java", font=("Arial", 12)).grid(row=0, column=0, columnspan=2, sticky="w")
+profile_label = tk.Label(java_f, text="", fg="gray")
+profile_label.grid(row=1, column=0, columnspan=2, sticky="w")
 
-tk.Label(java_f, text="Минимум ОЗУ (например 2G):").pack(anchor="w", pady=(10, 0))
+tk.Label(java_f, text="Режим:").grid(row=2, column=0, sticky="w", pady=2)
+mode_combobox = ttk.Combobox(java_f, state="readonly", width=14, values=list(MODES.values()))
+mode_combobox.grid(row=2, column=1, sticky="w")
 
-min_ram_entry = tk.Entry(java_f, width=20)
-min_ram_entry.insert(0, java_config.get("min_memory", "2G"))
-min_ram_entry.pack(anchor="w")
+tk.Label(java_f, text="Макс. ОЗУ:").grid(row=3, column=0, sticky="w", pady=2)
+max_ram_entry = tk.Entry(java_f, width=10)
+max_ram_entry.grid(row=3, column=1, sticky="w")
 
+tk.Label(java_f, text="Мин. ОЗУ:").grid(row=4, column=0, sticky="w", pady=2)
+min_ram_entry = tk.Entry(java_f, width=10)
+min_ram_entry.grid(row=4, column=1, sticky="w")
 
-tk.Label(java_f, text="Доп. аргументы JVM:").pack(anchor="w", pady=(10,0))
+tk.Label(java_f, text="GC:").grid(row=5, column=0, sticky="w", pady=2)
+gc_combobox = ttk.Combobox(java_f, state="readonly", width=14, values=list(jvm_profiles.GC_PRESETS))
+gc_combobox.grid(row=5, column=1, sticky="w")
+
+tk.Label(java_f, text="Доп. аргументы JVM:").grid(row=6, column=0, columnspan=2, sticky="w", pady=(6, 0))
 jvm_extra_entry = tk.Entry(java_f, width=30)
-jvm_extra_entry.insert(0, java_config.get("args", ""))
-jvm_extra_entry.pack(anchor="w")
+jvm_extra_entry.grid(row=7, column=0, columnspan=2, sticky="w")
+
+auto_hint = tk.Label(java_f, text="", fg="gray")
+auto_hint.grid(row=8, column=0, columnspan=2, sticky="w", pady=(4, 0))
+
+def read_java_fields():
+    mode = next((k for k, v in MODES.items() if v == mode_combobox.get()), "manual")
+    return {"mode": mode,
+            "max_memory": max_ram_entry.get().strip(),
+            "min_memory": min_ram_entry.get().strip(),
+            "gc": gc_combobox.get() or "default",
+            "args": jvm_extra_entry.get().strip()}
+
+def update_auto_hint(_event=None):
+    #в авто-режиме поля памяти не редактируются, а подсказка показывает, что выйдет сейчас
+    auto = read_java_fields()["mode"] == "auto"
+    for e in (max_ram_entry, min_ram_entry):
+        e.configure(state="disabled" if auto else "normal")
+    if auto:
+        build = core.find_build(builds_combobox.get())
+        running = len(core.get_supervisor().running())
+        xmx, xms = jvm_profiles.auto_heap(build["type"] if build else "vanilla", running)
+        auto_hint["text"] = f"Сейчас: -Xmx{jvm_profiles.format_size(xmx)} -Xms{jvm_profiles.format_size(xms)}"
+    else:
+        auto_hint["text"] = ""
+
+def load_java_fields(_event=None):
+    name = builds_combobox.get()
+    profile = jvm_profiles.profile_for(java_config, name)
+    profile_label["text"] = f"Профиль: {name}" if name else "Профиль по умолчанию"
+    mode_combobox.set(MODES.get(profile["mode"], MODES["manual"]))
+    for e, key in ((max_ram_entry, "max_memory"), (min_ram_entry, "min_memory"), (jvm_extra_entry, "args")):
+        e.configure(state="normal")
+        e.delete(0, "end")
+        e.insert(0, profile[key])
+    gc_combobox.set(profile["gc"])
+    update_auto_hint()
+
+mode_combobox.bind("<<ComboboxSelected>>", update_auto_hint)
 
 def save_java_settings():
-    java_config["max_memory"] = max_ram_entry.get().strip()
-    java_config["min_memory"] = min_ram_entry.get().strip()
-    java_config["args"] = jvm_extra_entry.get().strip()
-    save_java_config(java_config)
-    messagebox.showinfo("Сохранено", "Параметры Java сохранены")
-
-tk.Button(java_f, text="Сохранить", command=save_java_settings).pack(pady=10)
+    name = builds_combobox.get()
+    if name:
+        jvm_profiles.save_profile(java_config, name, read_java_fields())
+    else:
+        java_config.update(read_java_fields())
+    core.save_java_config(java_config)
+    messagebox.showinfo("Сохранено", f"Параметры Java для {name or 'всех сборок'} сохранены")
+
+def save_java_defaults():
+    #поля становятся общими настройками, у выбранной сборки сбрасываем переопределения
+    java_config.update(read_java_fields())
+    java_config.setdefault("profiles", {}).pop(builds_combobox.get(), None)
+    core.save_java_config(java_config)
+    messagebox.showinfo("Сохранено", "Параметры Java сохранены для всех сборок")
+
+java_btns = tk.Frame(java_f)
+java_btns.grid(row=9, column=0, columnspan=2, pady=8)
+tk.Button(java_btns, text="Сохранить", command=save_java_settings).pack(side="left")
+tk.Button(java_btns, text="Для всех", command=save_java_defaults).pack(side="left", padx=5)
+
+# Запущенные клиенты ------------------------------------------------------
+running_f = tk.Frame(root, bd=2, relief="solid", padx=10, pady=10)
+running_f.place(x=290, y=10, width=350, height=300)
+tk.Label(running_f, text="Запущенные клиенты", font=("Arial", 12)).pack(anchor="w")
+running_list = tk.Listbox(running_f, height=11, activestyle="none")
+running_list.pack(fill="both", expand=True, pady=5)
+running_names = []      # имена в том же порядке, что строки в списке
+crash_notified = set()  # (имя, pid), о которых уже сказали
+
+def selected_instance():
+    sel = running_list.curselection()
+    return core.get_supervisor().get(running_names[sel[0]]) if sel else None
+
+def fmt_uptime(seconds):
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}"
+
+def show_instance_log():
+    inst = selected_instance()
+    if not inst:
+        return
+    win = tk.Toplevel(root)
+    win.title(f"Лог: {inst.name} (pid {inst.pid})")
+    win.geometry("800x450")
+    text = tk.Text(win, wrap="none", font=("Consolas", 9))
+    text.pack(fill="both", expand=True)
+    shown = [None]
+    #обновляем, пока окно открыто; перерисовываем только если появились строки
+    def refresh():
+        if not win.winfo_exists():
+            return
+        lines = inst.tail(500)
+        if lines and lines[-1] is not shown[0]:
+            at_end = text.yview()[1] >= 0.999
+            text.delete("1.0", "end")
+            text.insert("end", "\n".join(lines))
+            if at_end:
+                text.see("end")
+            shown[0] = lines[-1]
+        if inst.returncode is None:
+            win.after(1000, refresh)
+    refresh()
+
+def stop_instance():
+    inst = selected_instance()
+    if inst and inst.returncode is None and messagebox.askyesno("Остановить", f"Закрыть {inst.name}?"):
+        task_runner.submit(f"Остановка {inst.name}", lambda task: inst.stop())
+
+def forget_instance():
+    inst = selected_instance()
+    if inst:
+        core.get_supervisor().forget(inst.name)
+
+btns = tk.Frame(running_f)
+btns.pack(fill="x")
+tk.Button(btns, text="Лог", command=show_instance_log).pack(side="left")
+tk.Button(btns, text="Остановить", command=stop_instance).pack(side="left", padx=5)
+tk.Button(btns, text="Убрать", command=forget_instance).pack(side="left")
+
+def poll_instances():
+    sel = running_list.curselection()
+    running_list.delete(0, "end")
+    running_names.clear()
+    for inst in core.get_supervisor().instances():
+        if inst.status == "running":
+            rss = inst.rss()
+            state = f"работает, {rss // (1024 * 1024)} МБ" if rss else "работает"
+        elif inst.status == "crashed":
+            state = f"упал (код {inst.returncode})"
+        else:
+            state = "закрыт"
+        running_list.insert("end", f"{inst.name} — {state}, {fmt_uptime(inst.uptime())}")
+        running_names.append(inst.name)
+        if inst.status == "crashed" and (inst.name, inst.pid) not in crash_notified:
+            crash_notified.add((inst.name, inst.pid))
+            extra = f"\nОтчёт: {inst.crash_report}" if inst.crash_report else ""
+            messagebox.showerror("Игра упала", f"Сборка {inst.name} завершилась с кодом {inst.returncode}{extra}")
+    if sel and sel[0] < len(running_names):
+        running_list.selection_set(sel[0])
+    root.after(1000, poll_instances)
+
+# Фоновые задачи ----------------------------------------------------------
+tasks_f = tk.Frame(root, bd=2, relief="solid", padx=10, pady=5)
+task_rows = {}  # id задачи -> (строка, подпись, прогрессбар)
+
+def poll_tasks():
+    task_runner.poll()
+    current = {t.id: t for t in task_runner.tasks()[:4]}
+    for tid in list(task_rows):
+        if tid not in current:
+            task_rows.pop(tid)[0].destroy()
+    for t in current.values():
+        if t.id not in task_rows:
+            row = tk.Frame(tasks_f)
+            row.pack(fill="x", pady=1)
+            lbl = tk.Label(row, anchor="w", width=70)
+            lbl.pack(side="left")
+            bar = ttk.Progressbar(row, length=220, mode="indeterminate")
+            bar.pack(side="left", padx=5)
+            bar.start(15)
+            tk.Button(row, text="Отмена", command=t.cancel).pack(side="left")
+            task_rows[t.id] = (row, lbl, bar)
+        _, lbl, bar = task_rows[t.id]
+        lbl["text"] = f"{t.title}: {t.status}"
+        if t.maximum and str(bar["mode"]) != "determinate":
+            bar.stop()
+            bar.configure(mode="determinate")
+        if t.maximum:
+            bar.configure(maximum=t.maximum, value=t.value)
+    #пустую панель не показываем
+    if current:
+        tasks_f.place(x=10, y=320, width=900, height=120)
+    else:
+        tasks_f.place_forget()
+    root.after(100, poll_tasks)
 
 # Нижняя панель -----------------------------------------------------------
 bottom = tk.Frame(root, bd=2, relief="solid", padx=10, pady=10)
 bottom.place(x=10, y=450, width=900, height=70)
 
-bottom.grid_columnconfigure(4, weight=1)
+bottom.grid_columnconfigure(5, weight=1)
 
 # Combobox сборок
 builds_label = tk.Label(bottom, text="Сборка:")
@@ -365,13 +331,15 @@ builds_label.grid(row=0, column=0, padx=5)
 builds_combobox = ttk.Combobox(bottom, state="readonly", width=25)
 
 def refresh_builds_cb():
-    names = [b["name"] for b in load_builds()]
+    names = core.get_builds_store().names()
     builds_combobox["values"] = names
     if names:
         builds_combobox.set(names[0])
+    load_java_fields()
 refresh_builds_cb()
 
 builds_combobox.grid(row=0, column=1, padx=5)
+builds_combobox.bind("<<ComboboxSelected>>", load_java_fields)
 
 # Кнопки создания/удаления/открытия --------------------------------------
 
@@ -390,46 +358,211 @@ def create_build_dialog():
     ver_cb = ttk.Combobox(dlg, state="readonly", width=22)
     ver_cb.grid(row=2,column=1,padx=5)
 
+    #версия Forge, показывается только для forge
+    forge_lbl = tk.Label(dlg, text="Forge:")
+    forge_cb = ttk.Combobox(dlg, state="readonly", width=22)
+
+    def update_forge_versions(*_):
+        index = core.get_forge_index()
+        mc = ver_cb.get()
+        forge_cb["values"] = index.versions(mc)
+        forge_cb.set(index.pick(mc) or "")
+
     def update_versions(*_):
         vt = type_cb.get()
+        if vt == "forge":
+            forge_lbl.grid(row=3,column=0,padx=5)
+            forge_cb.grid(row=3,column=1,padx=5)
+        else:
+            forge_lbl.grid_remove()
+            forge_cb.grid_remove()
         if vt == "vanilla":
-            ver_cb["values"] = vanilla_version_ids
+            ver_cb["values"] = core.vanilla_version_ids
         elif vt == "fabric":
-            ver_cb["values"] = fabric_version_ids
+            ver_cb["values"] = core.fabric_version_ids
         else:  # forge
-            fetch_forge_promos()
-            ver_cb["values"] = sorted(forge_promos_cache.keys())
+            #индекс лежит на диске; пустой он только при самом первом запуске - тогда ждём фоновое обновление
+            if core.get_forge_index().is_empty():
+                ver_cb["values"] = []
+                ver_cb.set("Загрузка...")
+                def filled(_):
+                    if dlg.winfo_exists() and type_cb.get() == "forge" and not core.get_forge_index().is_empty():
+                        update_versions()
+                task_runner.submit("Версии Forge", lambda task: core.refresh_forge_index(), on_done=filled)
+                return
+            ver_cb["values"] = core.forge_mc_versions()
         if ver_cb["values"]:
             ver_cb.set(ver_cb["values"][0])
+        if vt == "forge":
+            update_forge_versions()
     type_cb.bind("<<ComboboxSelected>>", update_versions)
+    ver_cb.bind("<<ComboboxSelected>>", lambda _: type_cb.get() == "forge" and update_forge_versions())
     update_versions()
 
     def ok():
         try:
-            add_build(name_e.get().strip(), ver_cb.get(), type_cb.get())
+            core.add_build(name_e.get().strip(), ver_cb.get(), type_cb.get(), forge_cb.get() or None)
         except Exception as e:
             messagebox.showerror("Ошибка", str(e)); return
         refresh_builds_cb(); dlg.destroy()
-    tk.Button(dlg, text="Создать", command=ok).grid(row=3,column=0,columnspan=2,pady=10)
+    tk.Button(dlg, text="Создать", command=ok).grid(row=4,column=0,columnspan=2,pady=10)
 
 
 def delete_build():
     n = builds_combobox.get()
     if not n:
         return
+    if n in busy_builds:
+        return messagebox.showwarning("Удалить", f"Сборка {n} сейчас устанавливается")
+    if core.is_build_running(n):
+        return messagebox.showwarning("Удалить", f"Сборка {n} запущена, сначала закройте игру")
     if not messagebox.askyesno("Удалить", f"Удалить сборку {n}? Папка тоже будет удалена."):
         return
-    builds = load_builds(); builds = [b for b in builds if b["name"] != n]; save_builds(builds)
-    # удаляем папку
-    import shutil; shutil.rmtree(os.path.join(BUILDS_DIR, n), ignore_errors=True)
+    # папка мгновенно уезжает в корзину, а чистится уже в фоне
+    try:
+        core.delete_build(n)
+    except Exception as e:
+        return messagebox.showerror("Удалить", str(e))
+    refresh_builds_cb()
+    task_runner.submit(f"Удаление {n}", lambda task: core.purge_trash())
+
+
+def verify_selected_build():
+    n = builds_combobox.get()
+    if not n:
+        return
+    if n in busy_builds:
+        return messagebox.showwarning("Проверка", f"Сборка {n} сейчас устанавливается")
+    build = core.find_build(n)
+    if not build:
+        return messagebox.showerror("Сборка", "Метаданные не найдены")
+
+    def done(report):
+        if not report["bad"]:
+            messagebox.showinfo("Проверка", f"Сборка {n} в порядке, проверено файлов: {report['checked']}")
+        else:
+            messagebox.showinfo("Проверка", f"Сборка {n}: исправлено файлов: {report['repaired']}")
+
+    busy_builds.add(n)
+    task_runner.submit(f"Проверка {n}", lambda task: core.verify_build(build, callback=task.callback),
+                       on_done=done,
+                       on_error=lambda e: messagebox.showerror("Проверка", str(e)),
+                       on_finish=lambda: busy_builds.discard(n))
+
+
+def select_build(name):
     refresh_builds_cb()
+    builds_combobox.set(name)
+    load_java_fields()
+
+
+def clone_selected_build():
+    n = builds_combobox.get()
+    if not n:
+        return
+    if n in busy_builds:
+        return messagebox.showwarning("Копия", f"Сборка {n} сейчас устанавливается")
+    new_name = simpledialog.askstring("Копия сборки", "Название копии:", initialvalue=f"{n} (копия)", parent=root)
+    if not new_name or not new_name.strip():
+        return
+    new_name = new_name.strip()
+    busy_builds.add(n)
+    task_runner.submit(f"Копия {n}", lambda task: core.clone_build(n, new_name, callback=task.callback),
+                       on_done=lambda build: select_build(build["name"]),
+                       on_error=lambda e: messagebox.showerror("Копия", str(e)),
+                       on_finish=lambda: busy_builds.discard(n))
+
+
+def export_selected_build():
+    n = builds_combobox.get()
+    if not n:
+        return
+    if n in busy_builds:
+        return messagebox.showwarning("Экспорт", f"Сборка {n} сейчас устанавливается")
+    path = filedialog.asksaveasfilename(title="Экспорт сборки", initialfile=f"{n}.tar.gz", defaultextension=".tar.gz",
+                                        filetypes=[("Сборка EchoLauncher", "*.tar.gz")])
+    if not path:
+        return
+    busy_builds.add(n)
+    task_runner.submit(f"Экспорт {n}", lambda task: core.export_build(n, path, callback=task.callback),
+                       on_done=lambda report: messagebox.showinfo(
+                           "Экспорт", f"Сборка {n} сохранена: файлов {report['files']}, уникальных {report['objects']}"),
+                       on_error=lambda e: messagebox.showerror("Экспорт", str(e)),
+                       on_finish=lambda: busy_builds.discard(n))
+
+
+def import_build_dialog():
+    path = filedialog.askopenfilename(title="Импорт сборки", filetypes=[("Сборка EchoLauncher", "*.tar.gz")])
+    if not path:
+        return
+    name = simpledialog.askstring("Импорт сборки", "Название (пусто - как в архиве):", parent=root)
+    if name is None:
+        return
+    task_runner.submit("Импорт сборки", lambda task: core.import_build(path, name.strip() or None, callback=task.callback),
+                       on_done=lambda build: select_build(build["name"]),
+                       on_error=lambda e: messagebox.showerror("Импорт", str(e)))
+
+
+def disk_usage_window():
+    win = tk.Toplevel(root)
+    win.title("Место на диске")
+    win.geometry("640x420")
+    tree = ttk.Treeview(win, columns=("size", "own", "files"))
+    tree.heading("#0", text="Сборка / папка")
+    tree.heading("size", text="Размер")
+    tree.heading("own", text="Освободится")
+    tree.heading("files", text="Файлов")
+    for col in ("size", "own", "files"):
+        tree.column(col, width=110, anchor="e")
+    tree.pack(fill="both", expand=True)
+    status = tk.Label(win, anchor="w")
+    status.pack(fill="x")
+
+    def fill(usage):
+        if not win.winfo_exists():
+            return
+        tree.delete(*tree.get_children())
+        fmt = diskusage.fmt_size
+        for name, entry in sorted(usage["builds"].items(), key=lambda kv: -kv[1]["total"]["bytes"]):
+            total = entry["total"]
+            node = tree.insert("", "end", text=name, values=(fmt(total["bytes"]), fmt(total["own"]), total["files"]))
+            for comp, stats in sorted(entry["components"].items(), key=lambda kv: -kv[1]["bytes"]):
+                if stats["bytes"]:
+                    tree.insert(node, "end", text=comp, values=(fmt(stats["bytes"]), fmt(stats["own"]), stats["files"]))
+        titles = {"store": "Общее хранилище", "runtime": "Рантаймы Java", "trash": "Корзина"}
+        for key, stats in usage["shared"].items():
+            tree.insert("", "end", text=titles.get(key, key),
+                        values=(fmt(stats["bytes"]), fmt(stats["own"]), stats["files"]))
+        status["text"] = ""
+
+    def load(rescan=False):
+        status["text"] = "Подсчёт..."
+        task_runner.submit("Место на диске", lambda task: core.disk_usage(rescan=rescan), on_done=fill,
+                           on_error=lambda e: messagebox.showerror("Место на диске", str(e)))
+
+    def collected(report):
+        freed = sum(size for items in report.values() for _, size in items)
+        messagebox.showinfo("Очистка", f"Освобождено {diskusage.fmt_size(freed)}")
+        if win.winfo_exists():
+            load()
+
+    def collect():
+        status["text"] = "Уборка..."
+        task_runner.submit("Очистка диска", lambda task: core.collect_garbage(callback=task.callback),
+                           on_done=collected, on_error=lambda e: messagebox.showerror("Очистка", str(e)))
+
+    btns = tk.Frame(win)
+    btns.pack(fill="x", pady=5)
+    tk.Button(btns, text="Пересчитать", command=lambda: load(rescan=True)).pack(side="left", padx=5)
+    tk.Button(btns, text="Очистить", command=collect).pack(side="left")
+    load()
 
 
 def open_build_folder():
     n = builds_combobox.get()
     if not n:
         return
-    path = os.path.join(BUILDS_DIR, n)
+    path = core.build_dir(n)
     if os.path.isdir(path):
         webbrowser.open(path)
 
@@ -442,12 +575,45 @@ icon_open  = ImageTk.PhotoImage(Image.open("photos/papka.png").resize((45, 45)))
 btn_new  = tk.Button(bottom, image=icon_new,  command=create_build_dialog, width=50, height=50)
 btn_del  = tk.Button(bottom, image=icon_del,  command=delete_build,        width=50, height=50)
 btn_open = tk.Button(bottom, image=icon_open, command=open_build_folder,   width=50, height=50)
-for i,b in enumerate([btn_new, btn_del, btn_open], start=2):
+btn_check = tk.Button(bottom, text="✔", command=verify_selected_build, font=("Arial",16), width=2)   # проверить и починить файлы
+# копия/экспорт/импорт - в меню, чтобы не раздувать нижнюю панель
+btn_more = tk.Menubutton(bottom, text="⋯", font=("Arial",16), width=2, relief="raised")
+more_menu = tk.Menu(btn_more, tearoff=0)
+more_menu.add_command(label="Копия сборки...", command=clone_selected_build)
+more_menu.add_command(label="Экспорт в архив...", command=export_selected_build)
+more_menu.add_command(label="Импорт из архива...", command=import_build_dialog)
+more_menu.add_separator()
+more_menu.add_command(label="Место на диске...", command=disk_usage_window)
+btn_more["menu"] = more_menu
+for i,b in enumerate([btn_new, btn_del, btn_open, btn_check, btn_more], start=2):
     b.grid(row=0, column=i, padx=2)
 
-launch_btn = tk.Button(bottom, text="🚀 Запустить Minecraft", width=30, command=launch_selected_build, bg="#4CAF50", fg="white", font=("Arial",14,"bold"))
-launch_btn.grid(row=0, column=5, padx=20)
+launch_btn = tk.Button(bottom, text="🚀 Запустить Minecraft", width=23, command=launch_selected_build, bg="#4CAF50", fg="white", font=("Arial",14,"bold"))
+launch_btn.grid(row=0, column=7, padx=20)
+# Shift+клик - проверить/починить файлы сборки перед запуском
+def launch_with_repair(_event):
+    launch_selected_build(repair=True)
+    return "break"
+launch_btn.bind("<Shift-Button-1>", launch_with_repair)
 
-bottom.grid_columnconfigure(5, weight=1)
+bottom.grid_columnconfigure(7, weight=1)
 
+def on_close():
+    #игры при закрытии не убиваем, но их вывод после этого уже никто не читает
+    if core.get_supervisor().running() and not messagebox.askyesno(
+            "Выход", "Игры продолжат работать, но их лог перестанет записываться. Выйти?"):
+        return
+    task_runner.shutdown()
+    root.destroy()
+root.protocol("WM_DELETE_WINDOW", on_close)
+
+# уборка диска в фоне, когда окно уже открылось и стартовые загрузки прошли
+def start_gc():
+    task_runner.submit("Очистка диска", lambda task: core.collect_garbage(callback=task.callback),
+                       on_error=lambda e: print("[GC] Ошибка фоновой уборки:", e))
+if java_config.get("auto_gc", True):
+    root.after(java_config.get("auto_gc_delay", 60) * 1000, start_gc)
+
+poll_tasks()
+poll_instances()
 root.mainloop()
@@ -0,0 +1,102 @@
+import json, os, time, threading
+import requests
+import tracing
+
+# === Кэш манифестов версий ===
+# Храним ответы (manifest ванили, список версий фабрика и т.п.) на диске,
+# чтобы лаунчер открывался сразу, а сеть дёргалась в фоне.
+
+VANILLA_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+FABRIC_GAME_URL      = "https://meta.fabricmc.net/v2/versions/game"
+DEFAULT_TTL          = 6 * 60 * 60      # сколько секунд ответ считается свежим
+
+
+class ManifestCache:
+    def __init__(self, cache_file, ttl=DEFAULT_TTL, session=None):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("[Manifest] Кэш повреждён, начинаем заново:", e)
+            return {}
+
+    def _save(self):
+        #пишем во временный файл и подменяем, чтобы не словить обрезанный json
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_file)
+
+    def get_cached(self, url):
+        #только с диска, без сети; None если ещё ни разу не качали
+        entry = self._entries.get(url)
+        return entry["data"] if entry else None
+
+    def is_fresh(self, url):
+        entry = self._entries.get(url)
+        return bool(entry) and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def fetch(self, url, parse="json", force=False):
+        #свежий кэш отдаём сразу, иначе переспрашиваем сервер с ETag/Last-Modified
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry and not force and self.is_fresh(url):
+            return entry["data"]
+
+        with tracing.span("manifest fetch", url=url) as sp:
+            return self._revalidate(url, entry, parse, sp)
+
+    def _revalidate(self, url, entry, parse, sp):
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            r = self.session.get(url, headers=headers, timeout=15)
+            sp.set("status", r.status_code)
+            sp.set("bytes", len(r.content))
+            if r.status_code == 304 and entry:
+                data = entry["data"]
+            else:
+                r.raise_for_status()
+                data = r.json() if parse == "json" else r.text
+            new_entry = {"data": data,
+                         "etag": r.headers.get("ETag"),
+                         "last_modified": r.headers.get("Last-Modified"),
+                         "fetched_at": time.time()}
+            # 304 может прийти без заголовков, тогда оставляем старые
+            if r.status_code == 304:
+                new_entry["etag"] = new_entry["etag"] or entry.get("etag")
+                new_entry["last_modified"] = new_entry["last_modified"] or entry.get("last_modified")
+        except Exception as e:
+            if entry:
+                print(f"[Manifest] {url} недоступен, берём из кэша:", e)
+                return entry["data"]
+            raise
+        with self._lock:
+            self._entries[url] = new_entry
+            self._save()
+        return data
+
+
+#выдёргиваем id из манифестов
+def vanilla_ids(manifest):
+    if not manifest:
+        return []
+    return [v["id"] for v in manifest.get("versions", []) if v["type"] in ["release", "snapshot"]]
+
+def fabric_ids(game_versions):
+    if not game_versions:
+        return []
+    return [v["version"] for v in game_versions]
@@ -0,0 +1,194 @@
+import os, re, json, stat, shutil, subprocess, threading
+from downloader import jvm_platform
+import stamps
+import tracing
+from locking import file_lock, file_stamp
+
+# === Рантаймы жавы ===
+# Один набор рантаймов mojang на все сборки: instances/runtime/<компонент>/<платформа>/...
+# Папка runtime в сборке делается ссылкой (symlink, на windows - junction)
+# на общую, так что установщики minecraft_launcher_lib ставят туда же.
+# Какой компонент нужен - берём из javaVersion в version json, результат
+# `java -version` кэшируем по пути и mtime, чтобы не запускать жаву каждый раз.
+# Кэш общий для окна и cli.py: пишем под файловой блокировкой, перечитав его.
+
+DEFAULT_COMPONENT = "jre-legacy"      # у старых версий нет javaVersion
+IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003   # junction на windows (в модуле stat есть только там)
+
+
+def java_executables(component_dir):
+    #где лежит java внутри рантайма на разных ОС
+    return [os.path.join(component_dir, "bin", "java.exe"),
+            os.path.join(component_dir, "bin", "java"),
+            os.path.join(component_dir, "jre.bundle", "Contents", "Home", "bin", "java")]
+
+
+def make_dir_link(target, link):
+    #True, если ссылку удалось сделать
+    try:
+        if os.name == "nt":
+            import _winapi
+            _winapi.CreateJunction(target, link)
+        else:
+            os.symlink(target, link, target_is_directory=True)
+        return True
+    except OSError as e:
+        print("[Runtime] Не удалось сослаться на общий рантайм, ставим в сборку:", e)
+        return False
+
+
+def is_dir_link(path):
+    #symlink или junction: os.path.islink до 3.12 junction не видит
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISLNK(st.st_mode) or getattr(st, "st_reparse_tag", 0) == IO_REPARSE_TAG_MOUNT_POINT
+
+
+def unlink_dir_link(path):
+    #убираем саму ссылку, общая папка остаётся
+    if os.name == "nt":
+        os.rmdir(path)
+    else:
+        os.unlink(path)
+
+
+class RuntimeRegistry:
+    def __init__(self, root, cache_file):
+        self.root = root                      # instances/runtime, имя папки обязательно runtime (см. install)
+        self.cache_file = cache_file
+        self.lock_path = cache_file + ".lock"
+        self._lock = threading.Lock()
+        self._stamp = file_stamp(cache_file)
+        self._probes = self._load()
+        os.makedirs(root, exist_ok=True)
+
+    def _load(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _reload_if_changed(self):
+        #под self._lock; кэш мог дописать другой процесс
+        stamp = file_stamp(self.cache_file)
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._probes = self._load()
+
+    def _save(self):
+        #только под file_lock, после _reload_if_changed
+        tmp = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._probes, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.cache_file)
+        self._stamp = file_stamp(self.cache_file)
+
+    # === Связка со сборкой ===
+    def link_build(self, game_dir):
+        #папку runtime сборки направляем в общую; старые сборки со своим рантаймом не трогаем
+        link = os.path.join(game_dir, "runtime")
+        if os.path.lexists(link):
+            return
+        os.makedirs(game_dir, exist_ok=True)
+        make_dir_link(self.root, link)
+
+    # === Что нужно версии ===
+    def required(self, game_dir, version_id):
+        #(компонент, мажорная версия жавы или None)
+        for data in stamps.load_version_chain(game_dir, version_id):
+            if "javaVersion" in data:
+                return data["javaVersion"].get("component", DEFAULT_COMPONENT), data["javaVersion"].get("majorVersion")
+        return DEFAULT_COMPONENT, 8
+
+    # === Поиск и проверка ===
+    def candidates(self, component, game_dir=None):
+        dirs = [os.path.join(self.root, component, jvm_platform(), component)]
+        if game_dir:
+            # сборки, поставленные до общего рантайма
+            dirs.append(os.path.join(game_dir, "runtime", component, jvm_platform(), component))
+        for d in dirs:
+            for exe in java_executables(d):
+                if os.path.isfile(exe):
+                    yield exe
+
+    def probe(self, java_path):
+        #мажорная версия жавы или None, если не запускается
+        try:
+            st = os.stat(java_path)
+        except OSError:
+            return None
+        key = os.path.abspath(java_path)
+        with self._lock:
+            self._reload_if_changed()
+            cached = self._probes.get(key)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["major"]
+        kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
+        try:
+            with tracing.span("java -version", path=java_path):
+                out = subprocess.run([java_path, "-version"], capture_output=True, text=True, timeout=30, **kwargs).stderr
+            m = re.search(r'version "([^"]+)"', out)
+            version = m.group(1) if m else None
+        except (OSError, subprocess.TimeoutExpired):
+            version = None
+        major = None
+        if version:
+            parts = version.split(".")
+            major = int(parts[1]) if parts[0] == "1" else int(re.match(r"\d+", parts[0]).group())
+        # неудачный запуск не кэшируем, вдруг это был случайный сбой
+        if major is not None:
+            with self._lock, file_lock(self.lock_path):
+                self._reload_if_changed()
+                self._probes[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "version": version, "major": major}
+                self._save()
+        return major
+
+    def find(self, component, major=None, game_dir=None):
+        for exe in self.candidates(component, game_dir):
+            found = self.probe(exe)
+            if found and (major is None or found >= major):
+                return exe
+        return None
+
+    def install(self, component, callback=None):
+        #ставим в общую папку: install_jvm_runtime кладёт всё в <каталог>/runtime
+        from minecraft_launcher_lib.runtime import install_jvm_runtime
+        install_jvm_runtime(component, os.path.dirname(self.root), callback=callback)
+
+    # === Сборка мусора ===
+    def components(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def collect(self, keep, dry_run=False):
+        #удаляем компоненты, которые не нужны ни одной сборке; [(путь, байт)]
+        removed = []
+        for component in self.components():
+            if component in keep:
+                continue
+            path = os.path.join(self.root, component)
+            size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files
+                       if not os.path.islink(os.path.join(d, f)))
+            if not dry_run:
+                with self._lock:
+                    shutil.rmtree(path)
+                with self._lock, file_lock(self.lock_path):
+                    self._reload_if_changed()
+                    # пробы удалённых java больше не нужны
+                    self._probes = {k: v for k, v in self._probes.items() if not k.startswith(path + os.sep)}
+                    self._save()
+                print(f"[Runtime] Удалён неиспользуемый рантайм {component}")
+            removed.append((path, size))
+        return removed
+
+    def get_java(self, game_dir, version_id, callback=None):
+        component, major = self.required(game_dir, version_id)
+        exe = self.find(component, major, game_dir)
+        if exe is None:
+            self.install(component, callback)
+            exe = self.find(component, major, game_dir)
+        if exe is None:
+            raise FileNotFoundError(f"Java runtime {component} для {jvm_platform()} не найден")
+        return exe
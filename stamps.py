@@ -0,0 +1,124 @@
+import os, json, time, hashlib
+from downloader import rules_allow
+
+# === Отметка об установке сборки ===
+# <сборка>/.echolauncher/install.json: какой version_id получился, версия
+# загрузчика и дайджест списка нужных файлов. Если отметка совпадает со
+# сборкой и файлы на месте - ensure_installed не ходит в сеть вообще.
+
+META_DIR   = ".echolauncher"
+STAMP_NAME = "install.json"
+
+
+def meta_dir(game_dir):
+    return os.path.join(game_dir, META_DIR)
+
+def stamp_path(game_dir):
+    return os.path.join(meta_dir(game_dir), STAMP_NAME)
+
+
+def load_version_chain(game_dir, version_id):
+    #version json + все, от кого он наследуется (fabric/forge -> ваниль)
+    chain = []
+    while version_id:
+        path = os.path.join(game_dir, "versions", version_id, version_id + ".json")
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        chain.append(data)
+        version_id = data.get("inheritsFrom")
+    return chain
+
+
+def maven_path(name):
+    #"group:artifact:version" -> group/artifact/version/artifact-version.jar (так лежат либы fabric)
+    group, artifact, version = name.split(":")[:3]
+    return os.path.join(*group.split("."), artifact, version, f"{artifact}-{version}.jar")
+
+
+def required_files(game_dir, version_id):
+    #json-ы цепочки, библиотеки и клиентский jar - без ассетов, их слишком много для быстрого пути
+    files = []
+    for data in load_version_chain(game_dir, version_id):
+        files.append(os.path.join("versions", data["id"], data["id"] + ".json"))
+        if "client" in data.get("downloads", {}):
+            files.append(os.path.join("versions", data["id"], data["id"] + ".jar"))
+        for lib in data.get("libraries", []):
+            if not rules_allow(lib.get("rules")):
+                continue
+            art = lib.get("downloads", {}).get("artifact")
+            if art and art.get("path"):
+                files.append(os.path.join("libraries", art["path"]))
+            elif "downloads" not in lib and lib.get("name", "").count(":") >= 2:
+                files.append(os.path.join("libraries", maven_path(lib["name"])))
+    return sorted(set(files))
+
+
+def files_digest(game_dir, version_id):
+    #только stat, без чтения файлов: пропавший или обрезанный файл меняет дайджест
+    h = hashlib.sha1()
+    for rel in required_files(game_dir, version_id):
+        try:
+            size = os.path.getsize(os.path.join(game_dir, rel))
+        except OSError:
+            size = -1
+        h.update(f"{rel.replace(os.sep, '/')}:{size}\n".encode())
+    return h.hexdigest()
+
+
+def read_stamp(game_dir):
+    try:
+        with open(stamp_path(game_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(game_dir, build, version_id, loader_version=None):
+    os.makedirs(meta_dir(game_dir), exist_ok=True)
+    stamp = {"type": build["type"],
+             "version": build["version"],
+             "version_id": version_id,
+             "loader_version": loader_version,
+             "digest": files_digest(game_dir, version_id),
+             "installed_at": time.time()}
+    tmp = stamp_path(game_dir) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, stamp_path(game_dir))
+    return stamp
+
+
+def refresh_digest(game_dir):
+    #после починки размеры файлов могли поменяться - обновляем дайджест в отметке
+    stamp = read_stamp(game_dir)
+    if not stamp:
+        return None
+    stamp["digest"] = files_digest(game_dir, stamp["version_id"])
+    tmp = stamp_path(game_dir) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, stamp_path(game_dir))
+    return stamp
+
+
+def check_stamp(game_dir, build):
+    #version_id, если сборка уже установлена и ничего не пропало, иначе None
+    stamp = read_stamp(game_dir)
+    if not stamp or stamp.get("type") != build["type"] or stamp.get("version") != build["version"]:
+        return None
+    #у forge-сборки версия загрузчика закреплена, сменили её - переустанавливаем
+    if build.get("loader_version") and stamp.get("loader_version") != build["loader_version"]:
+        return None
+    try:
+        if files_digest(game_dir, stamp["version_id"]) != stamp.get("digest"):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return stamp["version_id"]
+
+
+def clear_stamp(game_dir):
+    try:
+        os.remove(stamp_path(game_dir))
+    except FileNotFoundError:
+        pass
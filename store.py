@@ -0,0 +1,265 @@
+import json, os, sys, time, shutil, hashlib, threading, errno
+import tracing
+from locking import file_lock, file_stamp
+
+# === Общее хранилище файлов ===
+# Библиотеки, ассеты, клиентские jar и рантаймы жавы лежат один раз в
+# store/objects/<sha1[:2]>/<sha1>, а в папки сборок попадают ссылками
+# (reflink там, где ФС умеет, иначе hardlink, в крайнем случае копия).
+# index.json общий для окна и cli.py: перед записью его перечитываем под
+# файловой блокировкой, чтобы не затереть наборы, записанные другим процессом.
+
+# что из сборки считаем неизменяемым и тащим в хранилище
+SHARED_DIRS = ("libraries", "assets", "runtime", "versions")
+
+FICLONE = 0x40049409     # ioctl для reflink на linux (btrfs, xfs)
+GC_GRACE = 60 * 60       # свежие объекты не трогаем: absorb мог положить объект, но ещё не записать набор
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_shared_path(rel):
+    #rel - путь внутри сборки через "/"
+    parts = rel.split("/")
+    if parts[0] not in SHARED_DIRS:
+        return False
+    if parts[0] == "versions":
+        # только versions/<id>/<id>.jar: json и natives лаунчер/установщики переписывают
+        return len(parts) == 3 and parts[2] == parts[1] + ".jar"
+    if parts[0] == "runtime":
+        # .version и <component>.sha1 перезаписываются при каждой установке рантайма
+        return len(parts) > 4
+    return True
+
+
+class ContentStore:
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_file = os.path.join(root, "index.json")
+        self.lock_path = self.index_file + ".lock"
+        self._lock = threading.Lock()
+        self._reflink_ok = sys.platform.startswith("linux")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._stamp = file_stamp(self.index_file)
+        self._index = self._load_index()
+
+    def _reload_if_changed(self):
+        #под self._lock; файл мог переписать другой процесс
+        stamp = file_stamp(self.index_file)
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._index = self._load_index()
+
+    def _load_index(self):
+        # sets: mc_version -> {относительный путь: sha1}
+        if not os.path.isfile(self.index_file):
+            return {"sets": {}}
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("[Store] Индекс повреждён, начинаем заново:", e)
+            return {"sets": {}}
+
+    def _save_index(self):
+        #только под file_lock, после _reload_if_changed
+        tmp = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_file)
+        self._stamp = file_stamp(self.index_file)
+
+    def object_path(self, sha1):
+        return os.path.join(self.objects_dir, sha1[:2], sha1)
+
+    def has(self, sha1):
+        return os.path.isfile(self.object_path(sha1))
+
+    #ставим dst ссылкой на src: reflink -> hardlink -> копия
+    #hardlink=False - для изменяемых файлов: правка одной копии не должна задеть другую
+    def _link(self, src, dst, hardlink=True):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        # свой tmp на поток: одну и ту же сборку/объект могут ставить параллельно
+        tmp = f"{dst}.{threading.get_ident()}.lnk"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        if self._reflink_ok:
+            try:
+                import fcntl
+                with open(src, "rb") as s, open(tmp, "wb") as d:
+                    fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+                shutil.copystat(src, tmp)
+                os.replace(tmp, dst)
+                return
+            except (OSError, ImportError):
+                # ФС не умеет reflink - больше не пробуем
+                self._reflink_ok = False
+                if os.path.lexists(tmp):
+                    os.remove(tmp)
+        if not hardlink:
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+            return
+        try:
+            os.link(src, tmp)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+                raise
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+
+    def link_file(self, src, dst):
+        #неизменяемый файл из одной сборки в другую
+        self._link(src, dst)
+
+    def copy_file(self, src, dst):
+        #изменяемый файл: reflink, если ФС умеет, иначе обычная копия
+        self._link(src, dst, hardlink=False)
+
+    def is_linked(self, path, sha1):
+        #hardlink - тот же файл; reflink и копия получают mtime объекта (см. _link)
+        obj = self.object_path(sha1)
+        try:
+            a, b = os.stat(path), os.stat(obj)
+        except OSError:
+            return False
+        return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+    def put(self, path, sha1=None):
+        #кладём файл в хранилище и заменяем его ссылкой на объект
+        sha1 = sha1 or file_sha1(path)
+        obj = self.object_path(sha1)
+        if not os.path.isfile(obj):
+            self._link(path, obj)
+        elif not self.is_linked(path, sha1):
+            self._link(obj, path)
+        return sha1
+
+    def discard_if_corrupt(self, sha1):
+        #битый объект убираем, иначе починка опять сошлётся на него
+        obj = self.object_path(sha1)
+        if os.path.isfile(obj) and file_sha1(obj) != sha1:
+            os.remove(obj)
+            print(f"[Store] Объект {sha1} повреждён и удалён")
+            return True
+        return False
+
+    def link_into(self, sha1, dst):
+        #достаём объект по хэшу в нужное место; False если такого нет
+        obj = self.object_path(sha1)
+        if not os.path.isfile(obj):
+            return False
+        self._link(obj, dst)
+        return True
+
+    def known(self, mc_version):
+        #{относительный путь: sha1} общих файлов версии
+        with self._lock:
+            self._reload_if_changed()
+            return dict(self._index["sets"].get(mc_version, {}))
+
+    def remember(self, mc_version, files):
+        with self._lock, file_lock(self.lock_path):
+            self._reload_if_changed()
+            self._index["sets"].setdefault(mc_version, {}).update(files)
+            self._save_index()
+
+    @tracing.traced("store populate")
+    def populate(self, game_dir, mc_version):
+        #раскладываем в сборку всё, что уже знаем для этой версии майна,
+        #установщику останется только сверить хэши
+        files = self.known(mc_version)
+        linked = 0
+        for rel, sha1 in files.items():
+            parts = rel.split("/")
+            # чужие versions/<id> (fabric/forge) не подкладываем, их ставит свой установщик
+            if parts[0] == "versions" and parts[1] != mc_version:
+                continue
+            dst = os.path.join(game_dir, *parts)
+            if os.path.lexists(dst):
+                continue
+            if self.link_into(sha1, dst):
+                linked += 1
+        if linked:
+            print(f"[Store] {mc_version}: взято из хранилища {linked} файлов")
+        return linked
+
+    @tracing.traced("store absorb")
+    def absorb(self, game_dir, mc_version):
+        #после установки переносим файлы сборки в хранилище;
+        #то, что уже ссылка на объект, повторно не хэшируем
+        known = self.known(mc_version)
+        files = {}
+        added = 0
+        for top in SHARED_DIRS:
+            base = os.path.join(game_dir, top)
+            # runtime может быть ссылкой на общую папку рантаймов - там и так одна копия
+            if os.path.islink(base):
+                continue
+            for dirpath, _, filenames in os.walk(base):
+                for fn in filenames:
+                    path = os.path.join(dirpath, fn)
+                    if os.path.islink(path):
+                        continue
+                    rel = os.path.relpath(path, game_dir).replace(os.sep, "/")
+                    if not is_shared_path(rel):
+                        continue
+                    sha1 = known.get(rel)
+                    if sha1 and self.is_linked(path, sha1):
+                        files[rel] = sha1
+                        continue
+                    files[rel] = self.put(path)
+                    added += 1
+        self.remember(mc_version, files)
+        if added:
+            print(f"[Store] {mc_version}: в хранилище добавлено {added} файлов")
+        return added
+
+    # === Сборка мусора ===
+    def collect(self, keep_versions, grace=GC_GRACE, dry_run=False):
+        #забываем наборы версий, которых нет ни в одной сборке, и удаляем объекты вне оставшихся наборов
+        #возвращает [(путь, освобождено байт)]: объект, на который ещё есть hardlink
+        #из какой-то папки, место освободит только вместе с ней
+        #набор мог только что записать другой процесс (cli.py install) - берём индекс с диска
+        with self._lock, file_lock(self.lock_path):
+            self._reload_if_changed()
+            sets = self._index["sets"]
+            dropped = [v for v in sets if v not in keep_versions]
+            referenced = set()
+            for version, files in sets.items():
+                if version in keep_versions:
+                    referenced.update(files.values())
+            if dropped and not dry_run:
+                for version in dropped:
+                    del sets[version]
+                self._save_index()
+        removed = []
+        now = time.time()
+        for sub in os.listdir(self.objects_dir):
+            sub_dir = os.path.join(self.objects_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if name in referenced:
+                    continue
+                path = os.path.join(sub_dir, name)
+                try:
+                    st = os.lstat(path)
+                    # ctime меняют и hardlink, и os.replace, а mtime у объекта скопирован с исходного файла
+                    if now - max(st.st_ctime, st.st_mtime) < grace:
+                        continue
+                    if not dry_run:
+                        os.remove(path)
+                except OSError:
+                    continue
+                removed.append((path, st.st_size if st.st_nlink <= 1 else 0))
+        if removed and not dry_run:
+            print(f"[Store] Удалено объектов без ссылок: {len(removed)}")
+        return removed
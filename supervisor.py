@@ -0,0 +1,361 @@
+import os, sys, json, glob, time, threading, subprocess, collections
+import stamps
+import tracing
+
+# === Запущенные клиенты ===
+# Каждый запуск - Instance: stdout/stderr игры читает отдельный поток и
+# складывает строки в кольцевой буфер (последние RING_LINES) и в
+# <сборка>/.echolauncher/logs/console.log с ротацией по размеру. Второй поток
+# ждёт выхода и решает, упала ли игра: ненулевой код, свежий crash-reports/*
+# или hs_err_pid<pid>.log от JVM. pid пишется в .echolauncher/running.json,
+# так что и cli.py, и окно видят клиентов друг друга и не запускают сборку дважды.
+
+RING_LINES    = 2000
+LOG_NAME      = "console.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS   = 3
+PID_NAME      = "running.json"
+START_SLACK   = 10              # сек: "started" пишется сразу после Popen, время создания процесса чуть раньше
+
+
+class AlreadyRunning(Exception):
+    pass
+
+
+# === Процессы ОС ===
+def pid_alive(pid):
+    #0 и отрицательные для os.kill - это группа процессов, а не клиент
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return bool(ok) and code.value == 259                 # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_rss(pid):
+    #резидентная память процесса в байтах или None, если узнать не вышло
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000 | 0x0010, False, pid)   # QUERY_LIMITED | VM_READ
+        if not handle:
+            return None
+        try:
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+        return None
+    #macOS и прочие
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=5).stdout
+        return int(out.strip()) * 1024
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def process_started(pid):
+    #время создания процесса (unix time) или None, если узнать не вышло
+    try:
+        import psutil
+        return psutil.Process(pid).create_time()
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                #comm в скобках может содержать пробелы - режем после последней ")"
+                ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+            with open("/proc/stat") as f:
+                btime = next(int(line.split()[1]) for line in f if line.startswith("btime "))
+            return btime + ticks / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError, StopIteration):
+            return None
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        created, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        try:
+            if not ctypes.windll.kernel32.GetProcessTimes(handle, ctypes.byref(created), ctypes.byref(exited),
+                                                         ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+        #FILETIME - сотни наносекунд с 1601 года
+        return ((created.dwHighDateTime << 32) | created.dwLowDateTime) / 1e7 - 11644473600
+    #macOS и прочие: etime - сколько процесс уже живёт, [[дд-]чч:]мм:сс
+    try:
+        out = subprocess.run(["ps", "-o", "etime=", "-p", str(pid)], capture_output=True, text=True, timeout=5).stdout
+        days, _, rest = out.strip().rpartition("-")
+        seconds = 0
+        for part in rest.split(":"):
+            seconds = seconds * 60 + int(part)
+        return time.time() - seconds - int(days or 0) * 86400
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+# === Файл с pid ===
+def pid_path(game_dir):
+    return os.path.join(stamps.meta_dir(game_dir), PID_NAME)
+
+def read_running(game_dir):
+    #{"pid", "started", "log"} живого клиента этой сборки или None
+    try:
+        with open(pid_path(game_dir), encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    #битый файл без pid - клиента нет
+    if not isinstance(info, dict) or not pid_alive(info.get("pid")):
+        return None
+    #файл мог остаться от клиента, которого никто не дождался (cli.py launch без --wait,
+    #закрытое окно), а его pid ОС уже отдала другому процессу - сверяем время старта
+    started, created = info.get("started"), process_started(info["pid"])
+    if isinstance(started, (int, float)) and created is not None and abs(created - started) > START_SLACK:
+        _clear_running(game_dir, info["pid"])
+        return None
+    return info
+
+def _write_running(game_dir, info):
+    path = pid_path(game_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp, path)
+
+def _clear_running(game_dir, pid):
+    #чужой (более новый) pid не трогаем
+    try:
+        with open(pid_path(game_dir), encoding="utf-8") as f:
+            if json.load(f).get("pid") != pid:
+                return
+        os.remove(pid_path(game_dir))
+    except (OSError, ValueError):
+        pass
+
+
+# === Лог с ротацией ===
+def log_path(game_dir):
+    return os.path.join(stamps.meta_dir(game_dir), "logs", LOG_NAME)
+
+def rotate_log(path, backups=LOG_BACKUPS):
+    #console.log -> console.log.1 -> ... -> console.log.<backups>
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    if os.path.exists(path):
+        os.replace(path, f"{path}.1")
+
+
+class RotatingLog:
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rotate_log(path, backups)    # каждый запуск - с чистого файла
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, line):
+        self._f.write(line)
+        self._f.flush()
+        if self._f.tell() >= self.max_bytes:
+            self._f.close()
+            rotate_log(self.path, self.backups)
+            self._f = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._f.close()
+
+
+# === Один клиент ===
+class Instance:
+    def __init__(self, name, game_dir, proc, log=None, on_exit=None):
+        self.name = name
+        self.game_dir = game_dir
+        self.proc = proc
+        self.pid = proc.pid
+        self.started = time.time()
+        self.ended = None
+        self.returncode = None
+        self.crash_report = None
+        self.stopped = False          # остановили мы сами - это не падение
+        self.lines = collections.deque(maxlen=RING_LINES)
+        self._log = log
+        self._on_exit = on_exit
+        self._reader = None
+        if proc.stdout is not None:
+            self._reader = threading.Thread(target=self._read, daemon=True, name=f"log-{name}")
+            self._reader.start()
+        threading.Thread(target=self._wait, daemon=True, name=f"wait-{name}").start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            self.lines.append(line.rstrip("\r\n"))
+            if self._log:
+                self._log.write(line)
+        self.proc.stdout.close()
+
+    def _wait(self):
+        code = self.proc.wait()
+        if self._reader:
+            self._reader.join()
+        if self._log:
+            self._log.close()
+        self.crash_report = self._find_crash_report()
+        self.ended = time.time()
+        self.returncode = code
+        _clear_running(self.game_dir, self.pid)
+        print(f"[Supervisor] {self.name} завершился с кодом {code}")
+        if self._on_exit:
+            try:
+                self._on_exit(self)
+            except Exception as e:
+                print("[Supervisor] Ошибка в on_exit:", e)
+
+    def _find_crash_report(self):
+        found = glob.glob(os.path.join(self.game_dir, "crash-reports", "*.txt"))
+        found.append(os.path.join(self.game_dir, f"hs_err_pid{self.pid}.log"))
+        fresh = []
+        for path in found:
+            try:
+                if os.path.getmtime(path) >= self.started - 1:
+                    fresh.append(path)
+            except OSError:
+                pass
+        return max(fresh, key=os.path.getmtime) if fresh else None
+
+    @property
+    def status(self):
+        #running / exited / crashed
+        if self.returncode is None:
+            return "running"
+        if self.stopped or (self.returncode == 0 and not self.crash_report):
+            return "exited"
+        return "crashed"
+
+    def uptime(self):
+        return (self.ended or time.time()) - self.started
+
+    def rss(self):
+        return process_rss(self.pid) if self.returncode is None else None
+
+    def tail(self, n=200):
+        return list(self.lines)[-n:]
+
+    def wait(self, timeout=None):
+        self.proc.wait(timeout)
+        while self.ended is None:     # даём _wait дописать лог и найти краш-репорт
+            time.sleep(0.05)
+        return self.returncode
+
+    def stop(self, timeout=10):
+        if self.returncode is not None:
+            return
+        self.stopped = True
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+# === Все клиенты процесса лаунчера ===
+class Supervisor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances = {}
+
+    def check_not_running(self, name, game_dir):
+        inst = self._instances.get(name)
+        if inst and inst.returncode is None:
+            raise AlreadyRunning(f"Сборка {name} уже запущена (pid {inst.pid})")
+        other = read_running(game_dir)
+        if other:
+            raise AlreadyRunning(f"Сборка {name} уже запущена другим лаунчером (pid {other['pid']})")
+
+    def launch(self, name, game_dir, cmd, capture=True, on_exit=None):
+        #capture=False - вывод сразу в файл, без потоков: для cli.py, который не ждёт игру
+        with self._lock:
+            self.check_not_running(name, game_dir)
+            path = log_path(game_dir)
+            kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
+            with tracing.span("jvm spawn", build=name):
+                if capture:
+                    log = RotatingLog(path)
+                    proc = subprocess.Popen(cmd, cwd=game_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                            stdin=subprocess.DEVNULL, text=True, encoding="utf-8", errors="replace",
+                                            **kwargs)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    rotate_log(path)
+                    log = None
+                    with open(path, "w", encoding="utf-8") as out:
+                        proc = subprocess.Popen(cmd, cwd=game_dir, stdout=out, stderr=subprocess.STDOUT,
+                                                stdin=subprocess.DEVNULL, **kwargs)
+            _write_running(game_dir, {"pid": proc.pid, "started": time.time(), "log": path})
+            inst = Instance(name, game_dir, proc, log, on_exit)
+            self._instances[name] = inst
+            return inst
+
+    def get(self, name):
+        return self._instances.get(name)
+
+    def instances(self):
+        return list(self._instances.values())
+
+    def running(self):
+        return [i for i in self._instances.values() if i.returncode is None]
+
+    def forget(self, name):
+        #убрать завершившийся клиент из списка
+        with self._lock:
+            inst = self._instances.get(name)
+            if inst and inst.returncode is not None:
+                del self._instances[name]
@@ -0,0 +1,107 @@
+import queue, threading, itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# === Фоновые задачи ===
+# Долгие штуки (вход, установка, удаление) крутятся в пуле потоков, а в
+# поток Tk по очереди прилетают события: прогресс, результат, ошибка.
+# GUI раз в ~100 мс зовёт poll() через root.after и обновляет виджеты.
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    _ids = itertools.count(1)
+
+    def __init__(self, title):
+        self.id = next(self._ids)
+        self.title = title
+        self.status = "В очереди"
+        self.value = 0
+        self.maximum = 0
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        #зовём в долгих циклах, чтобы отмена срабатывала быстро
+        if self._cancel.is_set():
+            raise TaskCancelled(self.title)
+
+    # обработчики в формате callback у установщиков minecraft_launcher_lib
+    def set_status(self, text):
+        self.check()
+        self.status = text
+
+    def set_max(self, value):
+        self.check()
+        self.maximum = value
+        self.value = 0
+
+    def set_progress(self, value):
+        self.check()
+        self.value = value
+
+    @property
+    def callback(self):
+        return {"setStatus": self.set_status, "setMax": self.set_max, "setProgress": self.set_progress}
+
+
+class TaskRunner:
+    def __init__(self, workers=4):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="echo-task")
+        self._events = queue.Queue()
+        self._lock = threading.Lock()
+        self.active = {}      # id -> Task
+
+    def submit(self, title, fn, *args, on_done=None, on_error=None, on_finish=None, **kwargs):
+        #fn(task, *args, **kwargs) выполняется в пуле; on_done/on_error/on_finish - уже в потоке GUI (из poll)
+        #on_finish зовётся всегда, в том числе после отмены
+        task = Task(title)
+        with self._lock:
+            self.active[task.id] = task
+
+        def run():
+            try:
+                result = fn(task, *args, **kwargs)
+            except BaseException as e:
+                self._events.put((task, on_error, on_finish, e))
+            else:
+                self._events.put((task, on_done, on_finish, result))
+
+        self._pool.submit(run)
+        return task
+
+    def poll(self):
+        #разбираем готовые задачи; звать только из потока GUI
+        while True:
+            try:
+                task, handler, on_finish, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self.active.pop(task.id, None)
+            if on_finish is not None:
+                on_finish()
+            if isinstance(payload, TaskCancelled):
+                print(f"[Task] {task.title}: отменено")
+                continue
+            if handler is not None:
+                handler(payload)
+            elif isinstance(payload, BaseException):
+                print(f"[Task] {task.title}: ошибка:", payload)
+
+    def tasks(self):
+        with self._lock:
+            return list(self.active.values())
+
+    def shutdown(self):
+        for task in self.tasks():
+            task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,218 @@
+import os, sys, json, time, atexit, threading, functools
+
+# === Трассировка фаз лаунчера ===
+# Включается переменной ECHOLAUNCHER_TRACE (1 или путь к файлу) или флагом
+# --trace у main.py/cli.py. Пока выключено, span() отдаёт один общий пустой
+# объект, а @traced - одна проверка флага на вызов. Включённая трассировка
+# пишет спаны (длительность, байты, число HTTP-запросов) и первые импорты
+# модулей, а при выходе сохраняет Chrome trace (открывается в
+# chrome://tracing или ui.perfetto.dev) и печатает сводку в лог.
+
+ENV_VAR      = "ECHOLAUNCHER_TRACE"
+DEFAULT_FILE = "echolauncher-trace.json"
+
+_enabled = False
+_path = None
+_events = []
+_counters = {}
+_http_hooked = False
+_lock = threading.Lock()
+_local = threading.local()
+_t0 = time.perf_counter()
+
+
+def enabled():
+    return _enabled
+
+
+def _now_us():
+    return (time.perf_counter() - _t0) * 1e6
+
+
+class Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+
+    def add(self, key, value=1):
+        #счётчик спана (байты, файлы); заодно копится в общих итогах
+        self.args[key] = self.args.get(key, 0) + value
+        count(key, value)
+
+    def set(self, key, value):
+        self.args[key] = value
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        _local.stack.pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {"name": self.name, "cat": self.cat, "ph": "X", "ts": self.start, "dur": end - self.start,
+                 "pid": os.getpid(), "tid": threading.get_ident(), "args": self.args}
+        with _lock:
+            _events.append(event)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def add(self, key, value=1):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, cat="launcher", **args):
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, cat, args)
+
+
+def current():
+    #самый внутренний открытый спан этого потока (или пустой)
+    stack = getattr(_local, "stack", None) if _enabled else None
+    return stack[-1] if stack else _NO_SPAN
+
+
+def count(key, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def traced(name=None, cat="launcher"):
+    #декоратор: спан на каждый вызов функции
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(label, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# === Хуки на импорты и HTTP ===
+def _hook_imports():
+    import builtins
+    original = builtins.__import__
+
+    def traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+        #только первый импорт модуля, повторные - это поиск в sys.modules
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        with Span(f"import {name}", "import", {}):
+            module = original(name, globals, locals, fromlist, level)
+        #requests грузится лениво - цепляемся к нему, как только он появился
+        if not _http_hooked and "requests.adapters" in sys.modules:
+            _hook_http()
+        return module
+    builtins.__import__ = traced_import
+
+
+def _hook_http():
+    #все запросы requests: число, статус и размер ответа (если сервер его назвал)
+    global _http_hooked
+    _http_hooked = True
+    from requests.adapters import HTTPAdapter
+    send = HTTPAdapter.send
+
+    def traced_send(self, request, **kwargs):
+        with Span(f"http {request.method}", "http", {"url": request.url}) as s:
+            response = send(self, request, **kwargs)
+            s.set("status", response.status_code)
+            size = response.headers.get("Content-Length")
+            if size and size.isdigit():
+                s.args["bytes"] = int(size)
+            count("http_requests")
+            return response
+    HTTPAdapter.send = traced_send
+
+
+# === Включение и выгрузка ===
+def enable(path=None):
+    global _enabled, _path
+    if _enabled:
+        return
+    _enabled = True
+    _path = os.path.abspath(path or DEFAULT_FILE)
+    _hook_imports()
+    if "requests.adapters" in sys.modules:
+        _hook_http()
+    atexit.register(export)
+    print(f"[Trace] Трассировка включена, файл: {_path}")
+
+
+def enable_from_env():
+    value = os.environ.get(ENV_VAR, "")
+    if value and value != "0":
+        enable(None if value == "1" else value)
+
+
+def enable_from_argv(argv=None):
+    #--trace или --trace=<файл>; флаг убираем, чтобы его не видел argparse/Tk
+    argv = sys.argv if argv is None else argv
+    for i, arg in enumerate(argv):
+        if arg == "--trace" or arg.startswith("--trace="):
+            del argv[i]
+            enable(arg.partition("=")[2] or None)
+            return True
+    return False
+
+
+def summary(top=15):
+    #(имя, вызовов, всего мс, максимум мс) по убыванию общего времени
+    totals = {}
+    with _lock:
+        events = list(_events)
+    for e in events:
+        n, total, worst = totals.get(e["name"], (0, 0.0, 0.0))
+        totals[e["name"]] = (n + 1, total + e["dur"] / 1000, max(worst, e["dur"] / 1000))
+    rows = sorted(((name,) + v for name, v in totals.items()), key=lambda r: r[2], reverse=True)
+    return rows[:top]
+
+
+def export(path=None):
+    path = path or _path
+    with _lock:
+        data = {"traceEvents": list(_events), "displayTimeUnit": "ms",
+                "otherData": {"counters": dict(_counters)}}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    print(f"[Trace] Записано событий: {len(data['traceEvents'])} -> {path}")
+    for name, n, total, worst in summary():
+        print(f"[Trace] {name:<40} x{n:<5} всего {total:9.1f} мс   макс {worst:9.1f} мс")
+    for key, value in sorted(data["otherData"]["counters"].items()):
+        print(f"[Trace] {key}: {value}")
+
+
+enable_from_env()
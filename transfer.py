@@ -0,0 +1,273 @@
+import os, io, re, json, time, gzip, shutil, hashlib, tarfile
+import stamps
+import tracing
+from store import file_sha1, is_shared_path
+from runtimes import is_dir_link
+
+# === Копия, экспорт и импорт сборки ===
+# Копия: неизменяемое (библиотеки, ассеты, клиентский jar, рантайм) ставится
+# ссылкой через ContentStore (reflink -> hardlink -> копия), по-настоящему
+# копируются только конфиги, сохранения, моды и прочие изменяемые файлы.
+# Экспорт - потоковый tar.gz: первым идёт manifest.json (сборка, профиль JVM,
+# путь -> sha1), за ним каждое уникальное содержимое один раз как
+# objects/<sha1>. Импорт читает архив тем же потоком, объекты, которые уже
+# лежат в хранилище, не пишет, и целиком в памяти ничего не держит.
+
+FORMAT_VERSION = 1
+MANIFEST_NAME  = "manifest.json"
+OBJECTS_PREFIX = "objects/"
+COMPRESS_LEVEL = 1      # jar, ogg, png и регионы миров уже сжаты, сильнее жать - только тратить время
+BUILD_FIELDS   = ("name", "version", "type", "loader_version", "version_id")
+
+
+def _callbacks(callback):
+    callback = callback or {}
+    noop = lambda *_: None
+    return callback.get("setStatus", noop), callback.get("setMax", noop), callback.get("setProgress", noop)
+
+
+def walk_build(game_dir, runtime=True):
+    #(относительный путь через "/", полный путь) обычных файлов сборки
+    #из .echolauncher берём только отметку об установке: логи, pid и кэши привязаны к старой папке
+    #runtime=False - без рантайма (в архив не кладём, на другой машине он свой)
+    for dirpath, dirnames, filenames in os.walk(game_dir):
+        rel_dir = os.path.relpath(dirpath, game_dir).replace(os.sep, "/")
+        if rel_dir == ".":
+            # общий рантайм - ссылка на папку, его подключает RuntimeRegistry.link_build
+            dirnames[:] = [d for d in dirnames
+                           if not (d == "runtime" and (not runtime or is_dir_link(os.path.join(dirpath, d))))]
+            rel_dir = ""
+        elif rel_dir == stamps.META_DIR:
+            dirnames[:] = []
+            filenames = [fn for fn in filenames if fn == stamps.STAMP_NAME]
+        for fn in filenames:
+            path = os.path.join(dirpath, fn)
+            if os.path.islink(path):
+                continue
+            yield (f"{rel_dir}/{fn}" if rel_dir else fn), path
+
+
+def _safe_rel(rel):
+    #путь из чужого архива не должен выйти за папку сборки
+    #":" нельзя ни в одной части: на windows "mods/C:x" после join уходит на диск C:
+    parts = rel.split("/")
+    return bool(rel) and not rel.startswith("/") and ":" not in rel and "\\" not in rel \
+        and all(p not in ("", ".", "..") for p in parts)
+
+
+def _build_path(dst_dir, rel):
+    #полный путь файла из архива; проверяем ещё раз уже после join
+    path = os.path.join(dst_dir, *rel.split("/"))
+    root = os.path.realpath(dst_dir)
+    try:
+        inside = os.path.commonpath([root, os.path.realpath(path)]) == root
+    except ValueError:
+        inside = False          # другой диск
+    if not inside:
+        raise ValueError(f"Недопустимая запись в архиве: {rel}")
+    return path
+
+
+# === Копия ===
+@tracing.traced("build clone")
+def clone_build(src_dir, dst_dir, content_store, callback=None):
+    #{"linked", "copied"}; при ошибке недоделанная копия удаляется
+    set_status, set_max, set_progress = _callbacks(callback)
+    if os.path.lexists(dst_dir):
+        raise FileExistsError(f"Папка {dst_dir} уже существует")
+    files = list(walk_build(src_dir))
+    set_status("Копирование сборки")
+    set_max(len(files))
+    report = {"linked": 0, "copied": 0}
+    try:
+        os.makedirs(dst_dir)
+        for i, (rel, path) in enumerate(files, 1):
+            dst = os.path.join(dst_dir, *rel.split("/"))
+            if is_shared_path(rel):
+                content_store.link_file(path, dst)
+                report["linked"] += 1
+            else:
+                content_store.copy_file(path, dst)
+                report["copied"] += 1
+            set_progress(i)
+    except BaseException:
+        shutil.rmtree(dst_dir, ignore_errors=True)
+        raise
+    print(f"[Transfer] Копия {dst_dir}: ссылок {report['linked']}, скопировано {report['copied']}")
+    return report
+
+
+# === Экспорт ===
+def _manifest_files(game_dir, build, content_store, callback):
+    #путь -> [sha1, размер, mtime]; хэши общих файлов берём из индекса хранилища
+    set_status, set_max, set_progress = _callbacks(callback)
+    known = content_store.known(build["version"])
+    entries = list(walk_build(game_dir, runtime=False))
+    set_status("Подсчёт хэшей")
+    set_max(len(entries))
+    files = {}
+    for i, (rel, path) in enumerate(entries, 1):
+        st = os.stat(path)
+        sha1 = known.get(rel)
+        if not (sha1 and content_store.is_linked(path, sha1)):
+            sha1 = file_sha1(path)
+        files[rel] = [sha1, st.st_size, st.st_mtime]
+        set_progress(i)
+    return files
+
+
+@tracing.traced("build export")
+def export_build(game_dir, build, out, content_store, profile=None, callback=None):
+    #out - путь к архиву или открытый бинарный поток (например stdout)
+    set_status, set_max, set_progress = _callbacks(callback)
+    files = _manifest_files(game_dir, build, content_store, callback)
+    manifest = {"format": FORMAT_VERSION,
+                "exported_at": time.time(),
+                "build": {k: build[k] for k in BUILD_FIELDS if build.get(k) is not None},
+                "profile": profile,
+                "files": files}
+    #одно содержимое - один объект в архиве, берём его из первого файла с таким sha1
+    objects = {}
+    for rel, (sha1, size, _) in files.items():
+        objects.setdefault(sha1, (rel, size))
+
+    tmp = None
+    if isinstance(out, str):
+        tmp = out + ".part"
+        stream = open(tmp, "wb")
+    else:
+        stream = out
+    written = 0
+    try:
+        # gzip снаружи, а не "w|gz": так задаётся уровень сжатия
+        with gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=COMPRESS_LEVEL) as gz, \
+                tarfile.open(fileobj=gz, mode="w|") as tar:
+            data = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size, info.mtime = len(data), int(manifest["exported_at"])
+            tar.addfile(info, io.BytesIO(data))
+
+            set_status("Запись архива")
+            set_max(len(objects))
+            for i, (sha1, (rel, size)) in enumerate(objects.items(), 1):
+                info = tarfile.TarInfo(OBJECTS_PREFIX + sha1)
+                info.size, info.mtime = size, int(files[rel][2])
+                with open(os.path.join(game_dir, *rel.split("/")), "rb") as f:
+                    tar.addfile(info, f)
+                written += size
+                set_progress(i)
+        if tmp:
+            stream.close()
+            os.replace(tmp, out)
+    except BaseException:
+        if tmp:
+            stream.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    tracing.current().add("bytes", written)
+    print(f"[Transfer] Экспорт {build['name']}: файлов {len(files)}, объектов {len(objects)}")
+    return {"files": len(files), "objects": len(objects), "bytes": written}
+
+
+# === Импорт ===
+def _write_object(src, target, sha1):
+    #объект из архива: пишем рядом, сверяем sha1 и только потом ставим на место
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    part = target + ".part"
+    h = hashlib.sha1()
+    with open(part, "wb") as f:
+        for chunk in iter(lambda: src.read(1024 * 1024), b""):
+            h.update(chunk)
+            f.write(chunk)
+    if h.hexdigest() != sha1:
+        os.remove(part)
+        raise ValueError(f"Архив повреждён: объект {sha1} не совпадает с хэшем")
+    os.replace(part, target)
+
+
+def _read_manifest(tar):
+    member = tar.next()
+    if member is None or member.name != MANIFEST_NAME:
+        raise ValueError("Это не архив сборки EchoLauncher")
+    manifest = json.load(tar.extractfile(member))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия архива: {manifest.get('format')}")
+    for rel, (sha1, _, _) in manifest["files"].items():
+        if not _safe_rel(rel) or not re.fullmatch(r"[0-9a-f]{40}", sha1):
+            raise ValueError(f"Недопустимая запись в архиве: {rel}")
+    return manifest
+
+
+@tracing.traced("build import")
+def import_build(src, content_store, choose_dir, callback=None):
+    #src - путь к архиву или бинарный поток (например stdin)
+    #choose_dir(manifest) -> папка новой сборки; зовётся, как только прочитан manifest
+    set_status, set_max, set_progress = _callbacks(callback)
+    stream = open(src, "rb") if isinstance(src, str) else src
+    dst_dir = None
+    try:
+        with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+            manifest = _read_manifest(tar)
+            dst_dir = choose_dir(manifest)
+            if os.path.lexists(dst_dir):
+                raise FileExistsError(f"Папка {dst_dir} уже существует")
+            os.makedirs(dst_dir)
+            report = _unpack(tar, manifest, dst_dir, content_store, set_status, set_max, set_progress)
+    except BaseException:
+        if dst_dir and os.path.isdir(dst_dir):
+            shutil.rmtree(dst_dir, ignore_errors=True)
+        raise
+    finally:
+        if isinstance(src, str):
+            stream.close()
+    print(f"[Transfer] Импорт {manifest['build'].get('name')}: файлов {report['files']}, "
+          f"распаковано {report['unpacked']}, уже было в хранилище {report['reused']}")
+    return manifest, report
+
+
+def _unpack(tar, manifest, dst_dir, content_store, set_status, set_max, set_progress):
+    files = manifest["files"]
+    where = {}                      # sha1 -> пути с таким содержимым
+    for rel, (sha1, _, _) in files.items():
+        where.setdefault(sha1, []).append(rel)
+    #общее содержимое идёт в хранилище, остальное - сразу в первый путь сборки
+    placed = {}                     # sha1 -> где оно теперь лежит
+    report = {"files": len(files), "unpacked": 0, "reused": 0}
+    set_status("Распаковка")
+    set_max(len(where))
+    for member in tar:
+        sha1 = member.name[len(OBJECTS_PREFIX):]
+        rels = where.get(sha1)
+        if not member.isfile() or not member.name.startswith(OBJECTS_PREFIX) or not rels or sha1 in placed:
+            continue
+        shared = any(is_shared_path(rel) for rel in rels)
+        if shared and content_store.has(sha1):
+            # тело объекта tar пропустит сам, на диск ничего не пишем
+            report["reused"] += 1
+            placed[sha1] = content_store.object_path(sha1)
+        else:
+            target = content_store.object_path(sha1) if shared else _build_path(dst_dir, rels[0])
+            _write_object(tar.extractfile(member), target, sha1)
+            report["unpacked"] += 1
+            placed[sha1] = target
+        set_progress(len(placed))
+
+    set_status("Раскладка файлов")
+    shared_files = {}
+    for rel, (sha1, _, mtime) in files.items():
+        src = placed.get(sha1)
+        if src is None:
+            raise ValueError(f"Архив повреждён: нет объекта для {rel}")
+        dst = _build_path(dst_dir, rel)
+        if is_shared_path(rel):
+            content_store.link_file(src, dst)
+            shared_files[rel] = sha1
+            continue
+        if src != dst:
+            content_store.copy_file(src, dst)
+        os.utime(dst, (mtime, mtime))
+    #теперь хранилище знает эти файлы и подложит их следующей сборке той же версии
+    if shared_files:
+        content_store.remember(manifest["build"]["version"], shared_files)
+    return report
@@ -0,0 +1,149 @@
+import os, json, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
+from downloader import DownloadTask, jvm_platform
+import stamps
+import tracing
+
+# === Проверка целостности сборки ===
+# Сверяет библиотеки, ассеты, клиентский jar и рантайм с sha1 из version json
+# (у рантайма - с <компонент>.sha1, который пишет установщик). Хэши считаются
+# в несколько потоков (hashlib отпускает GIL), а результат кэшируется в
+# <сборка>/.echolauncher/hashes.json по пути, размеру и mtime - неизменённые
+# файлы повторно не читаются. Битые файлы можно сразу перекачать.
+
+CACHE_NAME = "hashes.json"
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def runtime_tasks(game_dir, version_id):
+    #файлы рантайма по <компонент>.sha1; url у них нет, чинит их переустановка рантайма
+    component = None
+    for data in stamps.load_version_chain(game_dir, version_id):
+        if "javaVersion" in data:
+            component = data["javaVersion"]["component"]
+            break
+    if not component:
+        return []
+    platform_dir = os.path.join(game_dir, "runtime", component, jvm_platform())
+    sha1_file = os.path.join(platform_dir, component + ".sha1")
+    tasks = []
+    try:
+        with open(sha1_file, encoding="utf-8") as f:
+            for line in f:
+                rel, _, rest = line.partition(" /#// ")
+                if not rest:
+                    continue
+                tasks.append(DownloadTask(None, os.path.join(platform_dir, component, rel), rest.split()[0], share=False))
+    except FileNotFoundError:
+        pass
+    return tasks
+
+
+class HashCache:
+    def __init__(self, game_dir):
+        self.path = os.path.join(stamps.meta_dir(game_dir), CACHE_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def lookup(self, path, st):
+        entry = self._entries.get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def remember(self, path, st, sha1):
+        with self._lock:
+            self._entries[path] = [st.st_size, st.st_mtime_ns, sha1]
+
+    def forget(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+
+@tracing.traced("verify check_files")
+def check_files(tasks, cache, workers=None, callback=None):
+    #возвращает (битые задачи, сколько файлов реально прочитали)
+    callback = callback or {}
+    tasks = [t for t in {t.path: t for t in tasks if t.sha1}.values()]
+    callback.get("setMax", lambda _: None)(len(tasks))
+    bad = []
+    hashed = [0]
+    done = [0]
+    lock = threading.Lock()
+
+    def check(task):
+        try:
+            st = os.stat(task.path)
+        except OSError:
+            with lock:
+                bad.append(task)
+            return
+        sha1 = cache.lookup(task.path, st)
+        if sha1 is None:
+            sha1 = _sha1(task.path)
+            cache.remember(task.path, st, sha1)
+            with lock:
+                hashed[0] += 1
+        if sha1 != task.sha1:
+            cache.forget(task.path)
+            with lock:
+                bad.append(task)
+        with lock:
+            done[0] += 1
+            callback.get("setProgress", lambda _: None)(done[0])
+
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        list(pool.map(check, tasks))
+    cache.save()
+    return bad, hashed[0]
+
+
+def verify_build(game_dir, version_id, file_downloader, runtime_registry=None, repair=True, callback=None):
+    callback = callback or {}
+    callback.get("setStatus", lambda _: None)("Проверка файлов")
+    # manifest=None: берём локальные json, сеть нужна только если пропал индекс ассетов
+    tasks = file_downloader.plan_version(version_id, game_dir, None, runtime=False) + runtime_tasks(game_dir, version_id)
+    cache = HashCache(game_dir)
+    bad, hashed = check_files(tasks, cache, callback=callback)
+    report = {"checked": len({t.path for t in tasks if t.sha1}), "hashed": hashed,
+              "bad": [os.path.relpath(t.path, game_dir) for t in bad], "repaired": 0}
+    if not bad or not repair:
+        return report
+
+    callback.get("setStatus", lambda _: None)(f"Починка: {len(bad)} файлов")
+    fixable = [t for t in bad if t.url]
+    broken_runtime = len(fixable) != len(bad)
+    store = file_downloader.store
+    for t in fixable:
+        if store is not None:
+            store.discard_if_corrupt(t.sha1)
+        if os.path.lexists(t.path):
+            os.remove(t.path)
+    file_downloader.download_all(fixable, callback)
+    if broken_runtime and runtime_registry is not None:
+        component, _ = runtime_registry.required(game_dir, version_id)
+        for t in bad:
+            if not t.url and os.path.lexists(t.path):
+                os.remove(t.path)
+        runtime_registry.install(component, callback)
+    report["repaired"] = len(bad)
+    stamps.refresh_digest(game_dir)
+    return report